@@ -0,0 +1,345 @@
+"""Load benchmark: throughput and latency of read/write/search/generate mixes.
+
+Drives the FastAPI app in-process against a local-mode Qdrant (in memory, or
+on disk with --qdrant-path) and a fake Ollama with configurable latencies, so
+it runs without any external services. --stores runs every scenario on each
+of several vector stores to compare them, including a Qdrant server. Every
+scenario starts from a freshly seeded collection and empty caches, and picks
+its operations from a seeded random generator, so runs are reproducible:
+
+    uv run python bench.py --scenarios mixed search-under-generation --requests 500
+    uv run python bench.py --stores memory local qdrant
+
+Results can be stored with --save-baseline and later runs compared against
+them with --baseline; the process exits with status 1 on a regression.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import httpx
+
+import main
+from embeddings import EmbeddingCache
+from ollama_client import OllamaClient
+from result_cache import ResultCache
+from write_queue import WriteBehindQueue, WriteJournal
+
+
+@dataclass
+class Scenario:
+    # Relative weights of the operations sent
+    mix: Dict[str, int] = field(default_factory=dict)
+    # Long generations started before the timed requests and not counted in them
+    generations: int = 0
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "read-heavy": Scenario({"read": 8, "list": 1, "search": 1}),
+    "search": Scenario({"search": 1}),
+    "write-heavy": Scenario({"create": 4, "patch": 4, "search": 2}),
+    "mixed": Scenario({"read": 4, "list": 1, "search": 3, "create": 1, "patch": 1}),
+    "search-under-generation": Scenario({"search": 1}, generations=4),
+}
+
+# Vector stores: embedded Qdrant in memory or on disk, or the Qdrant server at QDRANT_HOST
+STORES = ["memory", "local", "qdrant"]
+
+
+def fake_embedding(text: str) -> list:
+    """Deterministic pseudo-embedding so repeated texts map to the same vector"""
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    return [rng.uniform(-1, 1) for _ in range(main.VECTOR_SIZE)]
+
+
+def fake_ollama(embed_latency: float, generate_latency: float, calls: Counter) -> httpx.MockTransport:
+    """Ollama stand-in that sleeps for the configured time per call and counts calls in `calls`"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(await request.aread() or b"{}")
+        if request.url.path == "/api/embed":
+            calls["embed_calls"] += 1
+            calls["embed_texts"] += len(payload["input"])
+            await asyncio.sleep(embed_latency)
+            return httpx.Response(200, json={"embeddings": [fake_embedding(t) for t in payload["input"]]})
+        if request.url.path == "/api/generate":
+            calls["generate_calls"] += 1
+            await asyncio.sleep(generate_latency)
+            body = {"response": "A Title\n\nSome generated content.", "done": True}
+            return httpx.Response(200, content=json.dumps(body) + "\n")
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list) -> dict:
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "mean_ms": statistics.mean(ms),
+    }
+
+
+def report(label: str, stats: dict):
+    print(
+        f"  {label:<10} n={stats['count']:<5} p50={stats['p50_ms']:7.1f}ms "
+        f"p95={stats['p95_ms']:7.1f}ms p99={stats['p99_ms']:7.1f}ms mean={stats['mean_ms']:7.1f}ms"
+    )
+
+
+def synthetic_post(rng: random.Random, i: int) -> dict:
+    words = [rng.choice(("vector", "search", "python", "cache", "latency", "garden", "travel",
+                         "budget", "habit", "model")) for _ in range(rng.randint(40, 400))]
+    return {"title": f"Post {i} about {words[0]}", "content": " ".join(words), "topic": f"topic-{i % 8}"}
+
+
+class Workload:
+    """Issues one scenario's requests.
+
+    Request `n` draws its random choices from its own seeded generator, so the
+    same requests are sent whatever order concurrency runs them in.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, seed: int, post_ids: List[str]):
+        self.client = client
+        self.seed = seed
+        self.post_ids = post_ids
+
+    async def request(self, op: str, n: int) -> httpx.Response:
+        rng = random.Random(f"{self.seed}:{n}")
+        if op == "read":
+            return await self.client.get(f"/api/posts/{rng.choice(self.post_ids)}")
+        if op == "list":
+            return await self.client.get("/api/posts", params={"limit": 24})
+        if op == "search":
+            # Unique per request so every search pays for an embedding, not a cache hit
+            word = rng.choice(("python", "vector search", "healthy habits", "latency"))
+            return await self.client.get(f"/api/posts/search/{word} {n}")
+        if op == "create":
+            return await self.client.post("/api/posts", json=synthetic_post(rng, n))
+        if op == "patch":
+            return await self.client.patch(f"/api/posts/{rng.choice(self.post_ids)}",
+                                           json={"topic": f"topic-{n % 8}"})
+        raise ValueError(f"Unknown operation {op}")
+
+
+def failed(response: httpx.Response) -> bool:
+    """Non-200 responses and the API's {"error": ...} bodies"""
+    if response.status_code != 200:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return isinstance(body, dict) and "error" in body
+    return False
+
+
+async def seed_posts(count: int) -> List[str]:
+    rng = random.Random(0)
+    posts = [(f"00000000-0000-0000-0000-{i:012d}", synthetic_post(rng, i)) for i in range(count)]
+    for start in range(0, count, main.IMPORT_BATCH_SIZE):
+        await main.upsert_points(await main.build_points(posts[start:start + main.IMPORT_BATCH_SIZE]))
+    return [post_id for post_id, _ in posts]
+
+
+async def drop_collection(client, name: str):
+    """Delete the collection behind the alias `name`, and with it the alias"""
+    for alias in (await client.get_aliases()).aliases:
+        if alias.alias_name == name:
+            await client.delete_collection(alias.collection_name)
+
+
+async def run_scenario(name: str, args, calls: Counter, store: str = "memory") -> dict:
+    """Run one scenario on one vector store against a freshly seeded collection and empty caches"""
+    store_dir = None
+    collection = main.COLLECTION_NAME
+    if store == "local":
+        if args.qdrant_path:
+            path = f"{args.qdrant_path}/{name}"
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            store_dir = tempfile.TemporaryDirectory()
+            path = store_dir.name
+        main.qdrant = main.create_vector_store("local", path)
+    elif store == "qdrant":
+        # A throwaway collection, so a server holding real posts is left alone
+        main.COLLECTION_NAME = f"bench_{uuid.uuid4().hex[:8]}"
+        main.qdrant = main.create_vector_store("qdrant")
+    else:
+        main.qdrant = main.create_vector_store("local", None)
+    main.embedding_cache = EmbeddingCache(max_size=main.EMBEDDING_CACHE_SIZE)
+    main.search_cache = ResultCache(max_size=main.SEARCH_CACHE_SIZE, ttl=main.SEARCH_CACHE_TTL)
+    # Otherwise only the first run of a scenario would generate; later ones would be cache hits
+    main.generation_cache = ResultCache(max_size=main.GENERATION_CACHE_SIZE, ttl=main.GENERATION_CACHE_TTL)
+    main.generations_in_flight.clear()
+    journal_dir = tempfile.TemporaryDirectory() if args.write_behind else None
+    if journal_dir:
+        main.write_queue = WriteBehindQueue(WriteJournal(f"{journal_dir.name}/writes.db"), main.save_posts,
+                                            batch_size=main.WRITE_BATCH_SIZE, workers=main.WRITE_WORKERS)
+    try:
+        await main.ensure_collection()
+        post_ids = await seed_posts(args.posts)
+        if main.write_queue is not None:
+            main.write_queue.start()
+        calls.clear()
+
+        scenario = SCENARIOS[name]
+        rng = random.Random(args.seed)
+        ops = rng.choices(list(scenario.mix), weights=list(scenario.mix.values()), k=args.requests)
+        latencies: Dict[str, List[float]] = {op: [] for op in scenario.mix}
+        errors = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+            workload = Workload(client, args.seed, post_ids)
+
+            async def one(op: str, n: int):
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await workload.request(op, n)
+                    latencies[op].append(time.perf_counter() - start)
+                    errors += failed(response)
+
+            generations = [
+                asyncio.create_task(client.post("/api/generate", json={"topic": f"topic {i}"}))
+                for i in range(scenario.generations)
+            ]
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            await asyncio.gather(*(one(op, n) for n, op in enumerate(ops)))
+            elapsed = time.perf_counter() - start
+            await asyncio.gather(*generations)
+        if main.write_queue is not None:
+            # Queued writes still cost embedding calls; wait for them so the counts are complete
+            await main.write_queue.drain()
+        await main.drain_related()
+    finally:
+        if journal_dir:
+            await main.close_write_queue()
+            journal_dir.cleanup()
+        if store == "qdrant":
+            await drop_collection(main.qdrant, main.COLLECTION_NAME)
+            main.COLLECTION_NAME = collection
+        await main.qdrant.close()
+        main.qdrant = None
+        if store_dir:
+            store_dir.cleanup()
+
+    every = [latency for samples in latencies.values() for latency in samples]
+    return {
+        "requests": len(ops),
+        "errors": errors,
+        "rps": len(ops) / elapsed,
+        **summarize(every),
+        "embed_calls": calls["embed_calls"],
+        "embed_texts": calls["embed_texts"],
+        "generate_calls": calls["generate_calls"],
+        "operations": {op: summarize(samples) for op, samples in latencies.items() if samples},
+    }
+
+
+def print_result(name: str, result: dict):
+    print(
+        f"{name}: {result['requests']} requests, {result['rps']:.0f} req/s, {result['errors']} errors, "
+        f"{result['embed_calls']} embed calls ({result['embed_texts']} texts), "
+        f"{result['generate_calls']} generate calls"
+    )
+    report("all", result)
+    for op, stats in result["operations"].items():
+        report(op, stats)
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Ways `results` is worse than `baseline` by more than `tolerance` (a fraction)"""
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            found.append(f"{name}: {result['rps']:.0f} req/s, baseline {base['rps']:.0f}")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if result[key] > base[key] * (1 + tolerance):
+                found.append(f"{name}: {key} {result[key]:.1f}, baseline {base[key]:.1f}")
+        if result["embed_calls"] > base["embed_calls"] * (1 + tolerance):
+            found.append(f"{name}: {result['embed_calls']} embed calls, baseline {base['embed_calls']}")
+        if result["errors"] > base["errors"]:
+            found.append(f"{name}: {result['errors']} errors, baseline {base['errors']}")
+    return found
+
+
+async def run(args) -> dict:
+    calls = Counter()
+    main.ollama = OllamaClient([httpx.AsyncClient(
+        base_url="http://ollama",
+        transport=fake_ollama(args.embed_latency, args.generate_latency, calls),
+    )])
+    results = {}
+    try:
+        for name in args.scenarios:
+            for store in args.stores:
+                # One store keeps plain scenario names, so older baselines still compare
+                key = name if len(args.stores) == 1 else f"{name} [{store}]"
+                results[key] = await run_scenario(name, args, calls, store)
+                print_result(key, results[key])
+    finally:
+        await main.close_clients()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--posts", type=int, default=200, help="posts seeded before each scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--generate-latency", type=float, default=5.0)
+    parser.add_argument("--write-behind", action="store_true",
+                        help="acknowledge creates and updates before they are embedded")
+    parser.add_argument("--stores", nargs="+", choices=STORES,
+                        help="vector stores to compare (default: local with --qdrant-path, else memory)")
+    parser.add_argument("--qdrant-path", help="directory for the local store (default: a temporary one)")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="fail if worse than the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown before a run counts as a regression")
+    args = parser.parse_args(argv)
+    if not args.stores:
+        args.stores = ["local" if args.qdrant_path else "memory"]
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(run(args))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if found else 0)
@@ -0,0 +1,143 @@
+"""Storage profile benchmark: recall@10, search latency and memory per collection profile.
+
+Needs a running Qdrant server, since the in-memory client always searches
+exhaustively and ignores quantization and HNSW settings. Vectors are copied
+from the live collection, or generated with --synthetic; every profile gets
+a temporary collection that is deleted afterwards:
+
+    uv run python bench_profiles.py --synthetic 20000 --queries 200
+
+Recall is measured against exact (brute-force) search. Memory is the
+estimated resident size of vectors and HNSW graph, not a measurement.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import CollectionStatus, PointStruct, QuantizationSearchParams, SearchParams
+
+import main
+from bench import percentile
+from profiles import PROFILES, CollectionProfile
+
+BENCH_PREFIX = "bench_profile_"
+
+
+def normalize(vector: list) -> list:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def synthetic_vectors(count: int, size: int, clusters: int = 50, seed: int = 0) -> list:
+    """Clustered unit vectors, which are harder for approximate search than uniform noise"""
+    rng = random.Random(seed)
+    centers = [[rng.gauss(0, 1) for _ in range(size)] for _ in range(clusters)]
+    return [
+        normalize([c + rng.gauss(0, 0.5) for c in rng.choice(centers)])
+        for _ in range(count)
+    ]
+
+
+def dense_vector(vector) -> list:
+    """A post's single vector, or its first chunk's for chunked collections"""
+    if not isinstance(vector, dict):
+        return vector
+    if main.CHUNK_VECTOR_NAME in vector:
+        return vector[main.CHUNK_VECTOR_NAME][0]
+    return vector[""]
+
+
+async def collection_vectors(client: AsyncQdrantClient, limit: int) -> list:
+    """Dense vectors of up to `limit` posts from the live collection"""
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        points, offset = await client.scroll(
+            collection_name=main.COLLECTION_NAME,
+            limit=min(256, limit - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        vectors.extend(dense_vector(point.vector) for point in points)
+        if offset is None:
+            break
+    return vectors
+
+
+async def load(client: AsyncQdrantClient, profile: CollectionProfile, vectors: list) -> str:
+    name = BENCH_PREFIX + profile.name
+    await client.delete_collection(name)
+    await client.create_collection(collection_name=name, **profile.collection_config(len(vectors[0])))
+    for start in range(0, len(vectors), 256):
+        await client.upsert(
+            collection_name=name,
+            points=[PointStruct(id=start + i, vector=vector)
+                    for i, vector in enumerate(vectors[start:start + 256])],
+            wait=True,
+        )
+    # Searches only reflect the profile once the optimizer has built the index
+    while (await client.get_collection(name)).status != CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+    return name
+
+
+async def search_all(client: AsyncQdrantClient, name: str, queries: list, params) -> tuple:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        response = await client.query_points(collection_name=name, query=query, limit=10,
+                                             search_params=params)
+        latencies.append(time.perf_counter() - start)
+        results.append({point.id for point in response.points})
+    return results, latencies
+
+
+async def run(args):
+    client = AsyncQdrantClient(host=main.QDRANT_HOST, port=main.QDRANT_PORT,
+                               grpc_port=main.QDRANT_GRPC_PORT, prefer_grpc=main.QDRANT_PREFER_GRPC)
+    names = []
+    try:
+        if args.synthetic:
+            vectors = synthetic_vectors(args.synthetic, main.VECTOR_SIZE)
+        else:
+            vectors = await collection_vectors(client, args.limit)
+        if len(vectors) <= args.queries:
+            raise SystemExit(f"Only {len(vectors)} vectors available; use --synthetic")
+        rng = random.Random(1)
+        queries = [normalize([x + rng.gauss(0, 0.05) for x in vector])
+                   for vector in rng.sample(vectors, args.queries)]
+        print(f"{len(vectors)} vectors, {len(queries)} queries\n")
+
+        truth = None
+        print(f"{'profile':<10} {'recall@10':>9} {'p50':>9} {'p95':>9} {'est. RAM':>10}")
+        for profile_name in args.profiles:
+            profile = PROFILES[profile_name]
+            name = await load(client, profile, vectors)
+            names.append(name)
+            if truth is None:
+                exact = SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+                truth, _ = await search_all(client, name, queries, exact)
+            found, latencies = await search_all(client, name, queries, profile.search_params())
+            recall = sum(len(f & t) for f, t in zip(found, truth)) / sum(len(t) for t in truth)
+            ms = [s * 1000 for s in latencies]
+            memory = profile.estimated_memory(len(vectors), len(vectors[0])) / 2 ** 20
+            print(f"{profile.name:<10} {recall:>9.3f} {percentile(ms, 50):>7.2f}ms "
+                  f"{percentile(ms, 95):>7.2f}ms {memory:>8.1f}MB")
+    finally:
+        if not args.keep:
+            for name in names:
+                await client.delete_collection(name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--synthetic", type=int, help="generate this many vectors instead of reading the collection")
+    parser.add_argument("--limit", type=int, default=50000, help="vectors read from the collection")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    asyncio.run(run(parser.parse_args()))
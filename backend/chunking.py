@@ -0,0 +1,30 @@
+"""Splitting long posts into overlapping chunks, each embedded as one vector of a multivector"""
+from typing import List
+
+
+def chunk_words(text: str, size: int, overlap: int) -> List[str]:
+    """Windows of `size` words, each starting `size - overlap` words after the previous"""
+    words = text.split()
+    if len(words) <= size:
+        return [" ".join(words)]
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+def post_chunks(title: str, content: str, size: int = 256, overlap: int = 48,
+                max_chunks: int = 32) -> List[str]:
+    """Texts to embed for a post.
+
+    A post that fits into one chunk yields exactly `"{title} {content}"`, the
+    text single-vector embeddings were made from, so cached embeddings are
+    reused. Longer content is split and every chunk is prefixed with the
+    title, which keeps each chunk on topic.
+    """
+    if len(content.split()) <= size:
+        return [f"{title} {content}"]
+    return [f"{title} {chunk}" for chunk in chunk_words(content, size, overlap)[:max_chunks]]
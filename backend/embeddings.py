@@ -0,0 +1,255 @@
+"""Embedding cache (in-memory LRU over an optional on-disk store) and request batcher"""
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+KEY_SIZE = 32  # sha256 digest
+HEADER = struct.Struct("<4sI")  # magic, vector dimension
+MAGIC = b"EMB1"
+
+
+def cache_key(model: str, text: str) -> bytes:
+    """Content address of an embedding: hash of the model name and the exact text"""
+    return hashlib.sha256(model.encode() + b"\0" + text.encode()).digest()
+
+
+class DiskEmbeddingStore:
+    """Append-only file of (key, float32 vector) records, read through mmap.
+
+    The key index is rebuilt by scanning the file on open, so entries survive
+    restarts. A partially written trailing record (e.g. after a crash) is
+    truncated away. Several processes can share one file: appends take an
+    exclusive flock, and a lookup that misses first indexes whatever other
+    processes appended since the last scan.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.record_size = KEY_SIZE + dim * 4
+        self._index: Dict[bytes, int] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._scanned = HEADER.size
+
+        self._file = open(path, "a+b")
+        with self._locked():
+            self._file.seek(0, os.SEEK_END)
+            if self._file.tell() == 0:
+                self._file.write(HEADER.pack(MAGIC, dim))
+                self._file.flush()
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self):
+        self._remap()
+        magic, dim = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or dim != self.dim:
+            raise ValueError(
+                f"{self.path} holds {dim}-d embeddings, expected {self.dim}-d"
+            )
+        self._scan()
+        if self._scanned != len(self._mmap):
+            # Only safe under the lock: no other process is mid-append
+            self._file.truncate(self._scanned)
+            self._remap()
+
+    def _scan(self):
+        """Index the complete records appended since the last scan"""
+        if os.fstat(self._file.fileno()).st_size != len(self._mmap):
+            self._remap()
+        size = len(self._mmap)
+        while self._scanned + self.record_size <= size:
+            offset = self._scanned
+            self._index[self._mmap[offset:offset + KEY_SIZE]] = offset + KEY_SIZE
+            self._scanned += self.record_size
+
+    def _remap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: bytes) -> Optional[array]:
+        offset = self._index.get(key)
+        if offset is None:
+            self._scan()
+            offset = self._index.get(key)
+            if offset is None:
+                return None
+        if offset + self.dim * 4 > len(self._mmap):
+            self._remap()
+        vector = array("f")
+        vector.frombytes(self._mmap[offset:offset + self.dim * 4])
+        return vector
+
+    def put(self, key: bytes, vector: array):
+        if key in self._index:
+            return
+        if len(vector) != self.dim:
+            raise ValueError(f"expected a {self.dim}-d vector, got {len(vector)}")
+        with self._locked():
+            self._scan()
+            if key in self._index:
+                return
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(key + vector.tobytes())
+            self._file.flush()
+        self._index[key] = offset + KEY_SIZE
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class EmbeddingCache:
+    """LRU cache of embeddings keyed by (model, text hash).
+
+    Vectors are held as float32 arrays, roughly a sixth of the size of a list
+    of Python floats. Misses in memory fall through to the disk store when one
+    is attached, and disk hits are promoted back into the LRU.
+    """
+
+    def __init__(self, max_size: int = 10000, disk: Optional[DiskEmbeddingStore] = None):
+        self.max_size = max_size
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, array]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: bytes, vector: array):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = cache_key(model, text)
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        elif self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+        if vector is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return vector.tolist()
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        key = cache_key(model, text)
+        vector = array("f", embedding)
+        if self.max_size > 0:
+            self._remember(key, vector)
+        if self.disk is not None:
+            self.disk.put(key, vector)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched model calls.
+
+    The first pending text starts a `window`-second timer; everything submitted
+    before it fires (or until `max_batch` distinct texts are pending) is sent
+    through a single `fetch` call and the results are handed back to each
+    waiting caller. Identical texts in the same batch are embedded once.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch: int = 32,
+        window: float = 0.005,
+    ):
+        self.fetch = fetch
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = 0
+        self.texts = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        future = self._pending.get(text)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # Shielded so one cancelled caller doesn't cancel the result for the others
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[str, asyncio.Future]):
+        texts = list(batch)
+        self.batches += 1
+        self.texts += len(texts)
+        try:
+            vectors = await self.fetch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for text, vector in zip(texts, vectors):
+            if not batch[text].done():
+                batch[text].set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,177 @@
+"""LLM generation helpers: incremental title/content splitting and a FIFO concurrency limiter"""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class QueueFull(Exception):
+    """Every generation slot is busy and the waiting queue is at capacity"""
+
+
+class QueueTimeout(Exception):
+    """Waited too long in the queue for a generation slot"""
+
+
+def clean_title(line: str) -> str:
+    return line.replace("#", "").strip()
+
+
+class TitleContentSplitter:
+    """Splits generated text into title and content as tokens arrive.
+
+    The first non-empty line is the title (markdown heading marks removed);
+    blank lines after it are dropped and everything else is content. `feed`
+    returns ("title", text) once and ("content", delta) events as soon as they
+    can be decided, so they can be forwarded to the client immediately.
+    """
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.content = ""
+        self._buffer = ""
+        self._content_started = False
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        events = []
+        if self.title is None:
+            self._buffer += text
+            pending = self._buffer.lstrip()
+            if "\n" not in pending:
+                return events
+            line, text = pending.split("\n", 1)
+            self._buffer = ""
+            self.title = clean_title(line) or "Untitled"
+            events.append(("title", self.title))
+        if not self._content_started:
+            text = text.lstrip("\r\n")
+            if not text:
+                return events
+            self._content_started = True
+        self.content += text
+        events.append(("content", text))
+        return events
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Flush a response that never produced a line break (title only)"""
+        if self.title is not None:
+            return []
+        text = self._buffer.strip()
+        self._buffer = ""
+        self.title = clean_title(text) or "Untitled"
+        self.content = text
+        events = [("title", self.title)]
+        if text:
+            events.append(("content", text))
+        return events
+
+
+class GenerationLimiter:
+    """At most `concurrency` generations run at once; up to `max_queue` wait in FIFO order.
+
+    `enqueue` returns a ticket future that resolves once the caller holds a
+    slot, and raises QueueFull straight away when the queue is at capacity so
+    the request can be rejected before any work starts. Every ticket must be
+    passed to `release` exactly once, whether or not it was granted.
+
+    With `slots` (a shared.SharedSlots) a ticket that reaches the front of
+    this process's queue also waits for one of the slots shared by every
+    worker, so `concurrency` holds across processes rather than per process.
+    """
+
+    def __init__(self, concurrency: int = 1, max_queue: int = 8, slots=None, poll: float = 0.1):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.slots = slots
+        self.poll = poll
+        self.active = 0
+        self._queue: Deque[asyncio.Future] = deque()
+        # Shared slot locks held by granted tickets
+        self._held: Dict[asyncio.Future, object] = {}
+        self._grants = set()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self) -> asyncio.Future:
+        ticket = asyncio.get_running_loop().create_future()
+        if self.active < self.concurrency and not self._queue:
+            self.active += 1
+            self._grant(ticket)
+        elif len(self._queue) >= self.max_queue:
+            raise QueueFull()
+        else:
+            self._queue.append(ticket)
+        return ticket
+
+    def position(self, ticket: asyncio.Future) -> int:
+        """1-based place in the queue, 0 once the ticket holds a slot"""
+        try:
+            return self._queue.index(ticket) + 1
+        except ValueError:
+            # Out of the queue but not granted: waiting for a shared slot
+            return 0 if ticket.done() else 1
+
+    def _grant(self, ticket: asyncio.Future):
+        if self.slots is None:
+            ticket.set_result(None)
+            return
+        task = asyncio.create_task(self._grant_shared(ticket))
+        self._grants.add(task)
+        task.add_done_callback(self._grants.discard)
+
+    async def _grant_shared(self, ticket: asyncio.Future):
+        while not ticket.done():
+            lock = self.slots.try_acquire()
+            if lock is not None:
+                self._held[ticket] = lock
+                ticket.set_result(None)
+                return
+            await asyncio.sleep(self.poll)
+        # Given up while waiting for a shared slot; its local slot goes to the next waiter
+        self._hand_on()
+
+    def _hand_on(self):
+        """Pass a freed local slot straight to the next waiter, if any"""
+        while self._queue:
+            waiter = self._queue.popleft()
+            if not waiter.done():
+                self._grant(waiter)
+                return
+        self.active -= 1
+
+    def release(self, ticket: asyncio.Future):
+        if ticket.done() and not ticket.cancelled():
+            lock = self._held.pop(ticket, None)
+            if lock is not None:
+                lock.release()
+            self._hand_on()
+        else:
+            ticket.cancel()
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                pass
+
+    @asynccontextmanager
+    async def slot(self, timeout: float):
+        """Hold a slot for the duration of the block, waiting at most `timeout` seconds"""
+        ticket = self.enqueue()
+        try:
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket), timeout)
+            except asyncio.TimeoutError:
+                raise QueueTimeout() from None
+            yield
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "shared": self.slots is not None,
+        }
@@ -0,0 +1,23 @@
+"""Gunicorn settings for serving the API with one worker process per core:
+
+    uv sync --extra deploy
+    uv run gunicorn -c gunicorn.conf.py main:app
+
+Workers coordinate through SHARED_STATE_DIR (startup lock, shared write
+counter for cache invalidation, shared on-disk embedding cache, generation
+slots and bulk-delete progress), which defaults to a directory under /tmp
+here.
+"""
+import multiprocessing
+import os
+
+# Set before the workers import main, so every worker sees the same directory
+os.environ.setdefault("SHARED_STATE_DIR", "/tmp/blog-backend")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Generation requests can wait minutes for a slot; don't let the arbiter kill them
+timeout = int(os.getenv("WORKER_TIMEOUT", 360))
+graceful_timeout = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
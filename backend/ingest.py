@@ -0,0 +1,232 @@
+"""Streaming bulk import: parse -> embed in batches -> upsert in parallel chunks.
+
+Each stage is connected by a bounded queue, so a slow stage applies
+backpressure to the ones before it and memory stays constant however large
+the input is. Progress is tracked as a line watermark: every line before it
+has been upserted, so an interrupted import can resume from there.
+"""
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+IMPORT_NAMESPACE = uuid.UUID("8a7f2a5e-6b1c-4f0e-9d3a-2c5b7e9f1a40")
+MAX_REPORTED_ERRORS = 20
+
+Record = Tuple[int, Union[str, bytes]]  # (line number, raw line)
+Post = Tuple[str, dict]  # (point id, payload)
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    committed_lines: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    # Why the pipeline stopped early, if it did
+    error: Optional[str] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "committed_lines": self.committed_lines,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": self.errors,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class ImportFailed(Exception):
+    """A batch could not be embedded or upserted; `stats` tells where to resume"""
+
+    def __init__(self, stats: ImportStats):
+        super().__init__(stats.error)
+        self.stats = stats
+
+
+class Checkpoint:
+    """Line watermark persisted to a small JSON file, replaced atomically"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.line = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                self.line = json.load(f).get("line", 0)
+
+    def save(self, line: int):
+        self.line = line
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"line": line}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def parse_post(record: dict, source: Optional[str], line: int) -> Post:
+    """Validate one input record and derive its point id.
+
+    Records without an explicit id get a uuid5 of (source, line), so replaying
+    the same file after a crash overwrites points instead of duplicating them.
+    """
+    missing = [key for key in ("title", "content") if not record.get(key)]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    post_id = record.get("id") or (
+        str(uuid.uuid5(IMPORT_NAMESPACE, f"{source}:{line}")) if source else str(uuid.uuid4())
+    )
+    payload = {
+        "title": str(record["title"]),
+        "content": str(record["content"]),
+        "topic": str(record.get("topic") or ""),
+    }
+    return str(post_id), payload
+
+
+async def ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Split a byte stream (e.g. a request body) into numbered lines.
+
+    Lines stay bytes; the pipeline decodes them, so a line that is not valid
+    UTF-8 fails on its own instead of ending the import.
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def file_lines(path: str, fmt: str = "jsonl") -> AsyncIterator[Record]:
+    """Numbered records from a JSONL or CSV file; CSV rows are re-encoded as JSON"""
+    with open(path, newline="") as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=1):
+                yield line_no, json.dumps(row)
+        else:
+            for line_no, line in enumerate(f, start=1):
+                yield line_no, line
+                if line_no % 1000 == 0:
+                    # Let the other pipeline stages run between reads of a large file
+                    await asyncio.sleep(0)
+
+
+async def import_posts(
+    records: AsyncIterator[Record],
+    *,
+    build_points: Callable[[List[Post]], Awaitable[list]],
+    upsert: Callable[[list], Awaitable[None]],
+    source: Optional[str] = None,
+    batch_size: int = 64,
+    upload_workers: int = 4,
+    queue_size: int = 4,
+    checkpoint: Optional[Checkpoint] = None,
+    skip: int = 0,
+    on_progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """Run records through the parse -> embed -> upsert pipeline.
+
+    `build_points` embeds a batch of posts and returns Qdrant points, `upsert`
+    writes one chunk of points. Lines up to `skip` (or the checkpoint) are
+    skipped without being parsed. If a batch fails the pipeline stops and
+    raises ImportFailed, whose stats hold the lines committed so far.
+    """
+    stats = ImportStats()
+    start = time.perf_counter()
+    skip = max(skip, checkpoint.line if checkpoint else 0)
+    stats.committed_lines = skip
+
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    upload_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    # Batches finish out of order; the watermark only moves past contiguous ones
+    finished: Dict[int, int] = {}
+    next_seq = 0
+
+    def fail(line: int, reason: str):
+        stats.failed += 1
+        if len(stats.errors) < MAX_REPORTED_ERRORS:
+            stats.errors.append(f"line {line}: {reason}")
+
+    def commit(seq: int, last_line: int):
+        nonlocal next_seq
+        finished[seq] = last_line
+        while next_seq in finished:
+            stats.committed_lines = finished.pop(next_seq)
+            next_seq += 1
+        if checkpoint:
+            checkpoint.save(stats.committed_lines)
+
+    async def parse():
+        seq = 0
+        batch: List[Post] = []
+        last_line = skip
+        async for line_no, line in records:
+            if line_no <= skip or not line.strip():
+                continue
+            stats.rows += 1
+            last_line = line_no
+            try:
+                text = line.decode() if isinstance(line, bytes) else line
+                batch.append(parse_post(json.loads(text), source, line_no))
+            except (ValueError, TypeError, AttributeError) as exc:
+                fail(line_no, str(exc))
+            if len(batch) >= batch_size:
+                await embed_queue.put((seq, batch, last_line))
+                seq, batch = seq + 1, []
+        # A trailing batch may be empty but still carries the final watermark
+        await embed_queue.put((seq, batch, last_line))
+        await embed_queue.put(None)
+
+    async def embed():
+        while (item := await embed_queue.get()) is not None:
+            seq, batch, last_line = item
+            points = await build_points(batch) if batch else []
+            await upload_queue.put((seq, points, last_line))
+        for _ in range(upload_workers):
+            await upload_queue.put(None)
+
+    async def upload():
+        while (item := await upload_queue.get()) is not None:
+            seq, points, last_line = item
+            if points:
+                await upsert(points)
+            stats.imported += len(points)
+            commit(seq, last_line)
+            if on_progress:
+                stats.seconds = time.perf_counter() - start
+                on_progress(stats)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(parse())
+            group.create_task(embed())
+            for _ in range(upload_workers):
+                group.create_task(upload())
+    except BaseExceptionGroup as group:
+        # Surface the failure that stopped the pipeline rather than the group
+        cause = group.exceptions[0]
+        stats.error = f"{type(cause).__name__}: {cause}"
+        raise ImportFailed(stats) from cause
+    finally:
+        stats.seconds = time.perf_counter() - start
+    return stats
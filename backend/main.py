@@ -1,14 +1,356 @@
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from functools import partial
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from fastapi.middleware.gzip import GZipMiddleware
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HasIdCondition,
+    Fusion,
+    FusionQuery,
+    MatchAny,
+    MatchValue,
+    Modifier,
+    PayloadSchemaType,
+    PointStruct,
+    Prefetch,
+    QueryRequest,
+    SetPayload,
+    SetPayloadOperation,
+    SparseVectorParams,
+)
+import asyncio
+import base64
+import hashlib
 import httpx
+import json
 import uuid
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Literal, Optional, List, Union
 import os
 
-app = FastAPI()
+from chunking import post_chunks
+from embeddings import DiskEmbeddingStore, EmbeddingBatcher, EmbeddingCache
+from generation import GenerationLimiter, QueueFull, QueueTimeout, TitleContentSplitter
+from ingest import ImportFailed, import_posts, ndjson_lines
+from ollama_client import OllamaClient, OllamaError, OllamaUnavailable
+from metrics import InstrumentedClient, MetricsMiddleware, ProfilingMiddleware, registry, timed
+from profiles import CollectionProfile, get_profile
+from result_cache import ResultCache
+from shared import FileLock, JobStore, SharedCounter, SharedSlots
+from write_queue import WriteBehindQueue, WriteJournal
+import sparse
+
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+# "qdrant" talks to a Qdrant server; "local" runs Qdrant's embedded engine in-process
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant")
+QDRANT_PATH = os.getenv("QDRANT_PATH")  # directory of the local store; unset keeps it in memory
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# Comma-separated Ollama URLs; requests go to the least-loaded healthy one
+OLLAMA_HOSTS = [host.strip() for host in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if host.strip()]
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", 32))
+OLLAMA_EMBED_TIMEOUT = float(os.getenv("OLLAMA_EMBED_TIMEOUT", 30))  # deadline per embedding call, retries included
+OLLAMA_GENERATE_TIMEOUT = float(os.getenv("OLLAMA_GENERATE_TIMEOUT", 120))
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", 2))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", 0.2))
+OLLAMA_BREAKER_THRESHOLD = int(os.getenv("OLLAMA_BREAKER_THRESHOLD", 5))  # consecutive failures
+OLLAMA_BREAKER_RESET = float(os.getenv("OLLAMA_BREAKER_RESET", 30))
+OLLAMA_HEDGE_AFTER_MS = float(os.getenv("OLLAMA_HEDGE_AFTER_MS", 0))  # 0 disables hedged embedding calls
+EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+# Directory shared by all worker processes on a host; unset means a single process
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")  # unset keeps the cache in memory only
+if SHARED_STATE_DIR:
+    os.makedirs(SHARED_STATE_DIR, exist_ok=True)
+    EMBEDDING_CACHE_PATH = EMBEDDING_CACHE_PATH or os.path.join(SHARED_STATE_DIR, "embeddings.bin")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", 5))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 64))
+IMPORT_UPLOAD_WORKERS = int(os.getenv("IMPORT_UPLOAD_WORKERS", 4))
+HYBRID_PREFETCH_FACTOR = int(os.getenv("HYBRID_PREFETCH_FACTOR", 3))
+GENERATE_MODEL = os.getenv("GENERATE_MODEL", "llama3.2")
+GENERATE_CONCURRENCY = int(os.getenv("GENERATE_CONCURRENCY", 1))
+GENERATE_QUEUE_SIZE = int(os.getenv("GENERATE_QUEUE_SIZE", 8))
+GENERATE_QUEUE_TIMEOUT = float(os.getenv("GENERATE_QUEUE_TIMEOUT", 300))
+GENERATE_OPTIONS = json.loads(os.getenv("GENERATE_OPTIONS", "{}"))  # Ollama model options, e.g. temperature
+GENERATE_KEEP_ALIVE = os.getenv("GENERATE_KEEP_ALIVE", "30m")  # how long Ollama keeps the model loaded
+GENERATE_WARM_UP = os.getenv("GENERATE_WARM_UP", "true").lower() in ("1", "true", "yes")
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", 256))  # 0 disables the cache
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", 3600))
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 1024))  # 0 disables the cache
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 60))
+STARTUP_RETRY_DELAY = float(os.getenv("STARTUP_RETRY_DELAY", 2))
+REEMBED_BATCH_SIZE = int(os.getenv("REEMBED_BATCH_SIZE", 32))
+REEMBED_INTERVAL = float(os.getenv("REEMBED_INTERVAL", 1.0))  # pause between re-embed batches
+BULK_DELETE_POLL_INTERVAL = float(os.getenv("BULK_DELETE_POLL_INTERVAL", 0.5))
+BULK_DELETE_TIMEOUT = float(os.getenv("BULK_DELETE_TIMEOUT", 60))
+RELATED_POSTS = int(os.getenv("RELATED_POSTS", 5))  # 0 disables the precomputed related field
+RELATED_BATCH_SIZE = int(os.getenv("RELATED_BATCH_SIZE", 64))
+RELATED_QUEUE_SIZE = int(os.getenv("RELATED_QUEUE_SIZE", 10000))  # beyond this, refresh every post instead
+RELATED_RETRY_DELAY = float(os.getenv("RELATED_RETRY_DELAY", 5))
+COLLECTION_PROFILE = os.getenv("COLLECTION_PROFILE", "default")
+HNSW_M = int(os.getenv("HNSW_M", 0)) or None  # 0 keeps the profile's value
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", 0)) or None
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", 256))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 48))
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", 32))
+# Acknowledge creates and updates once journaled; embed and upsert them in the background
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_JOURNAL_PATH = os.getenv("WRITE_JOURNAL_PATH")  # default: write_journal.db, or in SHARED_STATE_DIR
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 64))
+WRITE_WORKERS = int(os.getenv("WRITE_WORKERS", 2))
+WRITE_RETRY_DELAY = float(os.getenv("WRITE_RETRY_DELAY", 1.0))  # doubled per failed attempt
+WRITE_MAX_ATTEMPTS = int(os.getenv("WRITE_MAX_ATTEMPTS", 8))
+WRITE_CLAIM_TIMEOUT = float(os.getenv("WRITE_CLAIM_TIMEOUT", 300))  # after this a dead worker's batch is retried
+COMPRESSION = os.getenv("COMPRESSION", "gzip")  # gzip, brotli (needs the brotli extra) or off
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # smaller bodies go uncompressed
+
+# Shared clients, created by the app lifespan (or open_clients() in scripts)
+qdrant: Optional[AsyncQdrantClient] = None
+ollama: Optional[OllamaClient] = None
+embedding_cache = EmbeddingCache(max_size=EMBEDDING_CACHE_SIZE)
+search_cache = ResultCache(max_size=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+generation_cache = ResultCache(max_size=GENERATION_CACHE_SIZE, ttl=GENERATION_CACHE_TTL)
+# Generations running per cache key, so identical requests wait for one result
+generations_in_flight: Dict[tuple, asyncio.Future] = {}
+# Storage layout used when creating a collection; see profiles.py
+collection_profile = get_profile(COLLECTION_PROFILE, HNSW_M, HNSW_EF_CONSTRUCT)
+# Whether the collection has the sparse keyword vector; set by ensure_collection()
+hybrid_enabled = False
+# Whether posts are stored as chunk multivectors; set by ensure_collection()
+chunks_enabled = False
+
+
+def shared_path(name: str) -> Optional[str]:
+    return os.path.join(SHARED_STATE_DIR, name) if SHARED_STATE_DIR else None
+
+
+# Bumped on every write; part of the search cache key so no result outlives a
+# write. Shared between workers, so a write in one drops every worker's cache.
+collection_generation = SharedCounter(shared_path("generation"))
+# Held while creating and seeding the collection, so only one worker does it
+startup_lock = FileLock(shared_path("startup.lock"))
+# Held by whichever worker runs the re-embedding job
+reembed_lock = FileLock(shared_path("reembed.lock"))
+# Each worker queues its own generation requests, but with SHARED_STATE_DIR
+# they share GENERATE_CONCURRENCY slots, one lock file each
+generation_limiter = GenerationLimiter(
+    concurrency=GENERATE_CONCURRENCY, max_queue=GENERATE_QUEUE_SIZE,
+    slots=SharedSlots([shared_path(f"generate-{i}.lock") for i in range(GENERATE_CONCURRENCY)])
+    if SHARED_STATE_DIR else None
+)
+# Readiness: set once the background warm-up has ensured the collection and seeded it
+ready = False
+startup_error: Optional[str] = None
+# Background job re-embedding posts whose vectors came from another model
+reembed_task: Optional[asyncio.Task] = None
+reembed_status = {"running": False, "processed": 0, "remaining": None, "error": None}
+# Progress of recent bulk deletes by job id, kept for an hour; readable by every worker
+delete_jobs = JobStore(shared_path("delete-jobs"), ttl=3600)
+# Strong references to fire-and-forget tasks, which asyncio only holds weakly
+background_tasks = set()
+# Posts whose precomputed related list needs recomputing, and (filter, scroll
+# offset) passes over posts to refresh page by page, e.g. those whose list
+# points at deleted posts; drained by related_task
+related_pending = set()
+related_stale_filters: List[tuple] = []
+related_task: Optional[asyncio.Task] = None
+# Journal and workers for write-behind mode; None when WRITE_BEHIND is off
+write_queue: Optional[WriteBehindQueue] = None
+
+
+def bump_generation():
+    collection_generation.increment()
+
+
+async def open_clients():
+    """Create the shared Ollama and Qdrant clients.
+
+    Neither constructor does network I/O (connections are opened on first
+    use), and clients that are already set, e.g. by tests or the benchmark,
+    are left alone.
+    """
+    global qdrant, ollama
+    if ollama is None:
+        ollama = OllamaClient(
+            [
+                httpx.AsyncClient(
+                    base_url=host,
+                    limits=httpx.Limits(
+                        max_connections=OLLAMA_MAX_CONNECTIONS,
+                        max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+                        keepalive_expiry=60.0,
+                    ),
+                )
+                for host in OLLAMA_HOSTS
+            ],
+            retries=OLLAMA_RETRIES,
+            backoff=OLLAMA_RETRY_BACKOFF,
+            breaker_threshold=OLLAMA_BREAKER_THRESHOLD,
+            breaker_reset=OLLAMA_BREAKER_RESET,
+            hedge_after=OLLAMA_HEDGE_AFTER_MS / 1000,
+        )
+    if qdrant is None:
+        qdrant = InstrumentedClient(create_vector_store(), "qdrant")
+
+
+class ThreadedQdrantClient:
+    """The AsyncQdrantClient API over a synchronous local-mode QdrantClient.
+
+    Local mode scores vectors with NumPy in the calling thread, so its async
+    client would hold the event loop for the whole of every search. Here
+    each call runs on one worker thread instead, in the order it was made.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self.wrapped = client
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-local")
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(attr, *args, **kwargs))
+
+        return call
+
+    async def close(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.wrapped.close)
+        finally:
+            self.executor.shutdown(wait=False)
+
+
+def create_vector_store(kind: str = VECTOR_STORE,
+                        path: Optional[str] = QDRANT_PATH) -> Union[AsyncQdrantClient, ThreadedQdrantClient]:
+    """Client for the configured vector store.
+
+    Both kinds expose the same client API, so nothing else depends on the
+    choice. The local store keeps vectors in NumPy arrays and searches them
+    exhaustively in this process: no network hop, and exact results, which
+    suits single-box deployments and small collections. Its calls run one
+    at a time on a worker thread, off the event loop. On disk it is locked
+    to a single process.
+    """
+    if kind == "local":
+        return ThreadedQdrantClient(QdrantClient(path=path) if path else QdrantClient(":memory:"))
+    if kind != "qdrant":
+        raise ValueError(f"Unknown VECTOR_STORE {kind!r}; expected 'qdrant' or 'local'")
+    return AsyncQdrantClient(
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=QDRANT_PREFER_GRPC,
+    )
+
+
+async def open_embedding_store():
+    """Attach the on-disk embedding cache; its index is rebuilt off the event loop"""
+    if EMBEDDING_CACHE_PATH and embedding_cache.disk is None:
+        embedding_cache.disk = await asyncio.to_thread(
+            DiskEmbeddingStore, EMBEDDING_CACHE_PATH, VECTOR_SIZE
+        )
+
+
+def open_write_queue():
+    """Open the write journal so writes can be accepted before the workers start"""
+    global write_queue
+    if WRITE_BEHIND and write_queue is None:
+        path = WRITE_JOURNAL_PATH or shared_path("write_journal.db") or "write_journal.db"
+        journal = WriteJournal(path, claim_timeout=WRITE_CLAIM_TIMEOUT)
+        if not SHARED_STATE_DIR:
+            # No other process uses the journal, so leftover leases are from a previous run
+            journal.release()
+        write_queue = WriteBehindQueue(
+            journal,
+            save_posts,
+            batch_size=WRITE_BATCH_SIZE,
+            workers=WRITE_WORKERS,
+            retry_delay=WRITE_RETRY_DELAY,
+            max_attempts=WRITE_MAX_ATTEMPTS,
+        )
+
+
+async def close_write_queue():
+    global write_queue
+    if write_queue is not None:
+        await write_queue.stop()
+        write_queue.journal.close()
+        write_queue = None
+
+
+async def close_clients():
+    """Close the shared clients, releasing pooled connections"""
+    global qdrant, ollama
+    if ollama is not None:
+        await ollama.aclose()
+        ollama = None
+    if qdrant is not None:
+        await qdrant.close()
+        qdrant = None
+    if embedding_cache.disk is not None:
+        embedding_cache.disk.close()
+        embedding_cache.disk = None
+
+
+async def warm_up():
+    """Prepare dependencies in the background, retrying until Qdrant is reachable"""
+    global ready, startup_error
+    while True:
+        try:
+            await open_embedding_store()
+            async with startup_lock:
+                await ensure_collection()
+                if await is_collection_empty():
+                    await seed_database()
+        except Exception as exc:
+            startup_error = f"{type(exc).__name__}: {exc}"
+            print(f"Startup not complete ({startup_error}); retrying in {STARTUP_RETRY_DELAY}s")
+            await asyncio.sleep(STARTUP_RETRY_DELAY)
+        else:
+            startup_error = None
+            ready = True
+            if write_queue is not None:
+                write_queue.start()
+            return
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start serving immediately; collection setup and seeding run in the background"""
+    global ready
+    await open_clients()
+    open_write_queue()
+    warm_up_task = asyncio.create_task(warm_up())
+    model_task = asyncio.create_task(warm_up_model()) if GENERATE_WARM_UP else None
+    try:
+        yield
+    finally:
+        for task in (warm_up_task, model_task, reembed_task, related_task):
+            if task is not None:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        ready = False
+        await close_write_queue()
+        await close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,16 +358,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Search-Mode"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if COMPRESSION == "brotli":
+    from brotli_asgi import BrotliMiddleware
 
-QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
-QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    # Falls back to gzip for clients without br; SSE must reach the client unbuffered
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+                       excluded_handlers=["/api/generate/stream"])
+elif COMPRESSION == "gzip":
+    # Server-Sent Events (text/event-stream) are never compressed
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+
+@app.exception_handler(OllamaUnavailable)
+async def ollama_unavailable(request: Request, exc: OllamaUnavailable):
+    """Calls needing the model fail fast while no Ollama host answers"""
+    return JSONResponse(
+        {"error": f"Model service unavailable: {exc}"},
+        status_code=503,
+        headers={"Retry-After": str(int(OLLAMA_BREAKER_RESET))},
+    )
 
-qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 
 COLLECTION_NAME = "blogposts"
 VECTOR_SIZE = 768  # nomic-embed-text dimension
+SPARSE_VECTOR_NAME = "bm25"
+CHUNK_VECTOR_NAME = "chunks"
+POST_FIELDS = ("title", "content", "topic")
+EXPORT_PAGE_SIZE = 256
 
 EXAMPLE_POSTS = [
     {
@@ -88,32 +452,155 @@ class BlogPost(BaseModel):
     topic: str
 
 
+class BlogPostPatch(BaseModel):
+    title: Optional[str] = None
+    content: Optional[str] = None
+    topic: Optional[str] = None
+
+
 class TopicRequest(BaseModel):
     topic: str
+    fresh: bool = False  # skip the generation cache
 
 
-def ensure_collection():
-    collections = qdrant.get_collections().collections
-    if not any(c.name == COLLECTION_NAME for c in collections):
-        qdrant.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
-        )
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    topic: Optional[str] = None
+
+
+class SimilarRequest(BaseModel):
+    ids: List[str]
+    limit: int = Field(5, ge=1, le=100)
+    topic: Optional[str] = None
+
+
+class PostView(BaseModel):
+    """A post in responses; fields not requested with `fields=` are left unset and omitted"""
+    id: Union[int, str]
+    title: Optional[str] = None
+    content: Optional[str] = None
+    topic: Optional[str] = None
+
+
+class ScoredPost(PostView):
+    score: float
 
 
-def get_embedding(text: str) -> List[float]:
-    """Get embedding from Ollama"""
-    response = httpx.post(
-        f"{OLLAMA_HOST}/api/embeddings",
-        json={"model": "nomic-embed-text", "prompt": text},
-        timeout=30.0
+class RelatedPost(BaseModel):
+    id: str
+    title: str
+    topic: str
+    score: float
+
+
+class PostDetail(PostView):
+    related: List[RelatedPost] = []
+
+
+class ErrorResponse(BaseModel):
+    error: str
+
+
+def versioned_collection_name(profile: CollectionProfile) -> str:
+    """Name for a new physical collection; COLLECTION_NAME is an alias pointing at it"""
+    return f"{COLLECTION_NAME}_{profile.name}_{uuid.uuid4().hex[:8]}"
+
+
+async def create_blog_collection(name: str, profile: CollectionProfile, sparse_vectors=None,
+                                 chunked: bool = True):
+    """Create a collection laid out according to `profile`, with the topic index"""
+    if sparse_vectors is None:
+        sparse_vectors = {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+    await qdrant.create_collection(
+        collection_name=name,
+        sparse_vectors_config=sparse_vectors,
+        **profile.collection_config(VECTOR_SIZE, CHUNK_VECTOR_NAME if chunked else None),
     )
-    return response.json()["embedding"]
+    await create_topic_index(name)
 
 
-def is_collection_empty() -> bool:
+async def create_topic_index(name: str):
+    # Keyword index so topic filters are applied inside the vector search
+    await qdrant.create_payload_index(
+        collection_name=name,
+        field_name="topic",
+        field_schema=PayloadSchemaType.KEYWORD,
+    )
+
+
+def has_chunk_vectors(info) -> bool:
+    vectors = info.config.params.vectors
+    return isinstance(vectors, dict) and CHUNK_VECTOR_NAME in vectors
+
+
+async def ensure_collection():
+    """Create the collection behind the COLLECTION_NAME alias if neither exists yet.
+
+    Collections created before profiles existed are plain collections named
+    COLLECTION_NAME; they keep working and migrate_collection.py moves them
+    behind an alias.
+    """
+    global hybrid_enabled, chunks_enabled
+    if not await qdrant.collection_exists(COLLECTION_NAME):
+        name = versioned_collection_name(collection_profile)
+        await create_blog_collection(name, collection_profile)
+        await qdrant.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=name, alias_name=COLLECTION_NAME))
+        ])
+        print(f"Created collection {name} ({collection_profile.name} profile) as {COLLECTION_NAME}")
+        hybrid_enabled = chunks_enabled = True
+        return
+    info = await qdrant.get_collection(COLLECTION_NAME)
+    hybrid_enabled = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+    if not hybrid_enabled:
+        print(f"Collection {COLLECTION_NAME} has no sparse vector; keyword search is disabled")
+    chunks_enabled = has_chunk_vectors(info)
+    if not chunks_enabled:
+        print(f"Collection {COLLECTION_NAME} stores one vector per post; long posts are embedded whole")
+    await create_topic_index(COLLECTION_NAME)
+
+
+async def fetch_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts with a single call to Ollama's /api/embed"""
+    async with timed("ollama.embed"):
+        response = await ollama.post(
+            "/api/embed",
+            json={"model": EMBED_MODEL, "input": texts},
+            timeout=OLLAMA_EMBED_TIMEOUT + len(texts),
+            hedge=True
+        )
+    return response.json()["embeddings"]
+
+
+embedding_batcher = EmbeddingBatcher(
+    fetch_embeddings,
+    max_batch=EMBED_BATCH_SIZE,
+    window=EMBED_BATCH_WINDOW_MS / 1000,
+)
+
+
+async def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Get embeddings for several texts, batching the cache misses into shared model calls"""
+    async with timed("embedding"):
+        embeddings = [embedding_cache.get(EMBED_MODEL, text) for text in texts]
+        missing = [text for text, embedding in zip(texts, embeddings) if embedding is None]
+        if missing:
+            fetched = dict(zip(missing, await embedding_batcher.embed_many(missing)))
+            for text, embedding in fetched.items():
+                embedding_cache.put(EMBED_MODEL, text, embedding)
+            embeddings = [fetched[text] if embedding is None else embedding
+                          for text, embedding in zip(texts, embeddings)]
+    return embeddings
+
+
+async def get_embedding(text: str) -> List[float]:
+    """Get embedding from Ollama, served from the embedding cache when possible"""
+    return (await get_embeddings([text]))[0]
+
+
+async def is_collection_empty() -> bool:
     """Check if the collection has any points"""
-    result = qdrant.scroll(
+    result = await qdrant.scroll(
         collection_name=COLLECTION_NAME,
         limit=1,
         with_payload=False,
@@ -122,73 +609,318 @@ def is_collection_empty() -> bool:
     return len(result[0]) == 0
 
 
-def seed_database():
-    """Seed the database with example posts"""
-    print("Seeding database with example posts...")
+def embedding_text(payload: dict) -> str:
+    return f"{payload['title']} {payload['content']}"
+
+
+def content_hash(payload: dict) -> str:
+    """Hash of exactly the text that gets embedded"""
+    return hashlib.sha256(embedding_text(payload).encode()).hexdigest()
+
+
+def embedding_texts(payload: dict) -> List[str]:
+    """Texts embedded for a post: its chunks, or the whole text for single-vector collections"""
+    if not chunks_enabled:
+        return [embedding_text(payload)]
+    return post_chunks(payload["title"], payload["content"], CHUNK_WORDS, CHUNK_OVERLAP, MAX_CHUNKS)
+
+
+def make_point(post_id: str, payload: dict, embeddings: List[List[float]]) -> PointStruct:
+    """Build a Qdrant point from the embeddings of `embedding_texts(payload)`.
+
+    Adds the keyword vector when the collection has one. The payload records
+    which text and model produced the vectors, so later edits that leave the
+    text alone can skip re-embedding, and how many chunk vectors there are.
+    """
+    vector = embeddings[0]
+    payload = {**payload, "content_hash": content_hash(payload), "embedding_model": EMBED_MODEL}
+    if chunks_enabled:
+        vector = {CHUNK_VECTOR_NAME: embeddings}
+        payload["chunk_count"] = len(embeddings)
+    elif hybrid_enabled:
+        vector = {"": embeddings[0]}
+    if hybrid_enabled:
+        vector[SPARSE_VECTOR_NAME] = sparse.document_vector(embedding_text(payload))
+    return PointStruct(id=post_id, vector=vector, payload=payload)
+
+
+async def build_points(posts: List[tuple]) -> List[PointStruct]:
+    """Embed a batch of (id, payload) posts, all chunks in shared batches, and build their points"""
+    texts = [embedding_texts(payload) for _, payload in posts]
+    embeddings = await get_embeddings([text for post_texts in texts for text in post_texts])
     points = []
-    for post in EXAMPLE_POSTS:
-        post_id = str(uuid.uuid4())
-        embedding = get_embedding(f"{post['title']} {post['content']}")
-        points.append(
-            PointStruct(
-                id=post_id,
-                vector=embedding,
-                payload={
-                    "title": post["title"],
-                    "content": post["content"],
-                    "topic": post["topic"]
-                }
-            )
-        )
-        print(f"  Prepared: {post['title']}")
+    for (post_id, payload), post_texts in zip(posts, texts):
+        points.append(make_point(post_id, payload, embeddings[:len(post_texts)]))
+        embeddings = embeddings[len(post_texts):]
+    return points
 
-    qdrant.upsert(
+
+async def upsert_points(points: List[PointStruct], refresh_related: bool = True):
+    await qdrant.upsert(
         collection_name=COLLECTION_NAME,
         points=points
     )
-    print(f"Successfully seeded {len(points)} blog posts!")
+    bump_generation()
+    if refresh_related:
+        schedule_related_refresh([point.id for point in points])
 
 
-@app.on_event("startup")
-async def startup():
-    ensure_collection()
-    if is_collection_empty():
-        seed_database()
+async def bulk_upsert_points(points: List[PointStruct]):
+    """upsert_points for bulk writers, which call schedule_related_rebuild once they finish"""
+    await upsert_points(points, refresh_related=False)
+
+
+async def seed_database():
+    """Seed the database with example posts"""
+    print("Seeding database with example posts...")
+    points = await build_points([
+        (str(uuid.uuid4()), {
+            "title": post["title"],
+            "content": post["content"],
+            "topic": post["topic"]
+        })
+        for post in EXAMPLE_POSTS
+    ])
+    for post in EXAMPLE_POSTS:
+        print(f"  Prepared: {post['title']}")
+
+    await upsert_points(points)
+    print(f"Successfully seeded {len(points)} blog posts!")
 
 
-@app.get("/api/posts/delete/{post_id}")
+@app.delete("/api/posts/{post_id}")
 async def delete_post(post_id: str):
-    qdrant.delete(
+    """Delete a post; deleting a post that does not exist also succeeds"""
+    if write_queue is not None:
+        await write_queue.delete([post_id])
+    await qdrant.delete(
         collection_name=COLLECTION_NAME,
         points_selector=[post_id]
     )
+    bump_generation()
+    schedule_related_cleanup([post_id])
     return {"status": "deleted", "id": post_id}
 
 
-@app.get("/api/posts")
-async def get_all_posts():
-    """Get all blog posts"""
-    result = qdrant.scroll(
+def bulk_delete_filter(request: BulkDeleteRequest) -> Filter:
+    conditions = []
+    if request.ids is not None:
+        conditions.append(HasIdCondition(has_id=request.ids))
+    if request.topic is not None:
+        conditions.append(FieldCondition(key="topic", match=MatchValue(value=request.topic)))
+    return Filter(must=conditions)
+
+
+async def count_matching(selector: Filter) -> int:
+    return (await qdrant.count(
+        collection_name=COLLECTION_NAME,
+        count_filter=selector,
+        exact=True
+    )).count
+
+
+async def matching_ids(selector: Filter) -> List[str]:
+    ids = []
+    offset = None
+    while True:
+        points, offset = await qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=selector,
+            limit=EXPORT_PAGE_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False
+        )
+        ids.extend(str(point.id) for point in points)
+        if offset is None:
+            return ids
+
+
+async def watch_bulk_delete(job: dict, request: BulkDeleteRequest):
+    """Apply a bulk delete, then poll until no post matches its filter and drop cached searches again.
+
+    Related lists hold copies of topics that may be stale, so for a delete by
+    topic the matching ids are collected first; once the delete is applied,
+    the related lists pointing at them are refreshed. Posts written after the
+    delete that match the same filter keep the count above zero, so polling
+    gives up after BULK_DELETE_TIMEOUT. Every change to `job` is saved to
+    delete_jobs, so any worker can report it.
+    """
+    selector = bulk_delete_filter(request)
+    try:
+        deleted_ids = request.ids or []
+        if RELATED_POSTS > 0 and request.topic is not None:
+            deleted_ids = await matching_ids(selector)
+        result = await qdrant.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=FilterSelector(filter=selector),
+            wait=False
+        )
+        job["operation_id"] = result.operation_id
+        bump_generation()
+        deadline = asyncio.get_running_loop().time() + BULK_DELETE_TIMEOUT
+        while True:
+            job["remaining"] = await count_matching(selector)
+            if job["remaining"] == 0:
+                job["status"] = "completed"
+                schedule_related_cleanup(deleted_ids)
+                break
+            if asyncio.get_running_loop().time() >= deadline:
+                job["status"] = "timed_out"
+                break
+            delete_jobs.put(job["id"], job)
+            await asyncio.sleep(BULK_DELETE_POLL_INTERVAL)
+    except Exception as exc:
+        job.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+    finally:
+        delete_jobs.put(job["id"], job)
+        # Searches cached while the delete was being applied may still list deleted posts
+        bump_generation()
+
+
+@app.post("/api/posts/bulk-delete")
+async def bulk_delete(request: BulkDeleteRequest):
+    """Delete posts by id list and/or topic with one filtered delete.
+
+    The delete is handed to a background task, which queues it without
+    waiting for Qdrant to apply it; the returned job id can be polled at
+    /api/posts/bulk-delete/{job_id}, and carries the Qdrant `operation_id`
+    once the delete is queued.
+    """
+    if request.ids is None and request.topic is None:
+        return {"error": "Give ids and/or topic to select the posts to delete"}
+    selector = bulk_delete_filter(request)
+    matched = await count_matching(selector)
+    if write_queue is not None:
+        # Queued writes of the selected posts, including posts not stored yet, must not land after this.
+        # A journaled write carries the whole post, so its topic tells whether the delete covers it.
+        doomed = request.ids
+        if request.topic is not None:
+            doomed = [post_id for post_id in await write_queue.pending_ids(request.topic)
+                      if request.ids is None or post_id in request.ids]
+        await write_queue.delete(doomed)
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "pending",
+        "operation_id": None,
+        "matched": matched,
+        "remaining": matched,
+    }
+    delete_jobs.put(job["id"], job)
+    task = asyncio.create_task(watch_bulk_delete(job, request))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return job
+
+
+@app.get("/api/posts/bulk-delete/{job_id}")
+async def bulk_delete_status(job_id: str):
+    job = delete_jobs.get(job_id)
+    if job is None:
+        return {"error": "Delete job not found"}
+    return job
+
+
+def encode_cursor(offset) -> str:
+    """Wrap a Qdrant scroll offset (int or UUID point id) in an opaque token"""
+    return base64.urlsafe_b64encode(json.dumps(offset).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(offset, (int, str)):
+        raise ValueError("cursor does not hold a point id")
+    return offset
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Payload fields to return; unknown names are ignored, empty means all"""
+    if not fields:
+        return list(POST_FIELDS)
+    return [field for field in fields.split(",") if field in POST_FIELDS]
+
+
+def snippet_text(text: str, length: int) -> str:
+    """`text` cut to at most `length` characters at a word boundary, marked with an ellipsis"""
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length + 1)
+    return text[:cut if cut > 0 else length].rstrip() + "…"
+
+
+def post_view(point, fields=POST_FIELDS, snippet: Optional[int] = None, model=PostView, **extra):
+    """Build the response model for a Qdrant point from the selected payload fields"""
+    values = {field: point.payload.get(field, "") for field in fields}
+    if snippet and "content" in values:
+        values["content"] = snippet_text(values["content"], snippet)
+    return model(id=point.id, **values, **extra)
+
+
+def with_snippet(post: PostView, snippet: Optional[int]) -> PostView:
+    if not snippet or post.content is None or len(post.content) <= snippet:
+        return post
+    return post.model_copy(update={"content": snippet_text(post.content, snippet)})
+
+
+@app.get("/api/posts", response_model=Union[List[PostView], ErrorResponse],
+         response_model_exclude_unset=True)
+async def get_all_posts(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    snippet: Optional[int] = Query(None, ge=1),
+):
+    """Get one page of blog posts.
+
+    The cursor for the next page is returned in the X-Next-Cursor header and
+    is absent on the last page. `snippet` cuts each post's content to about
+    that many characters.
+    """
+    try:
+        offset = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return {"error": "Invalid cursor"}
+    selected = parse_fields(fields)
+    points, next_offset = await qdrant.scroll(
         collection_name=COLLECTION_NAME,
-        limit=100,
-        with_payload=True,
+        limit=limit,
+        offset=offset,
+        with_payload=selected,
         with_vectors=False
     )
-    posts = []
-    for point in result[0]:
-        posts.append({
-            "id": point.id,
-            "title": point.payload.get("title", ""),
-            "content": point.payload.get("content", ""),
-            "topic": point.payload.get("topic", "")
-        })
-    return posts
+    if next_offset is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_offset)
+    return [post_view(point, selected, snippet) for point in points]
+
+
+@app.get("/api/posts/export")
+async def export_posts(fields: Optional[str] = None):
+    """Stream every post as NDJSON, one scroll page in memory at a time"""
+    selected = parse_fields(fields)
+
+    async def lines():
+        offset = None
+        while True:
+            points, offset = await qdrant.scroll(
+                collection_name=COLLECTION_NAME,
+                limit=EXPORT_PAGE_SIZE,
+                offset=offset,
+                with_payload=selected,
+                with_vectors=False
+            )
+            for point in points:
+                yield post_view(point, selected).model_dump_json(exclude_unset=True) + "\n"
+            if offset is None:
+                break
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
-@app.get("/api/posts/{post_id}")
+@app.get("/api/posts/{post_id}", response_model=Union[PostDetail, ErrorResponse])
 async def get_post(post_id: str):
     """Get a single blog post"""
-    result = qdrant.retrieve(
+    result = await qdrant.retrieve(
         collection_name=COLLECTION_NAME,
         ids=[post_id],
         with_payload=True
@@ -196,117 +928,869 @@ async def get_post(post_id: str):
     if not result:
         return {"error": "Post not found"}
     point = result[0]
+    return post_view(point, model=PostDetail, related=point.payload.get("related", []))
+
+
+def scored_post(point, snippet: Optional[int] = None) -> ScoredPost:
+    return post_view(point, snippet=snippet, model=ScoredPost, score=point.score)
+
+
+async def chunk_counts(post_ids: List) -> dict:
+    """Number of chunk vectors stored for each of `post_ids`.
+
+    Read from the `chunk_count` payload field; only posts written before it
+    was recorded have their vectors fetched to count them.
+    """
+    points = await qdrant.retrieve(
+        collection_name=COLLECTION_NAME,
+        ids=post_ids,
+        with_payload=["chunk_count"]
+    )
+    counts = {str(point.id): point.payload["chunk_count"] for point in points
+              if point.payload and "chunk_count" in point.payload}
+    uncounted = [point.id for point in points if str(point.id) not in counts]
+    if uncounted:
+        for point in await qdrant.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=uncounted,
+            with_payload=False,
+            with_vectors=[CHUNK_VECTOR_NAME]
+        ):
+            counts[str(point.id)] = len(point.vector[CHUNK_VECTOR_NAME])
+    return counts
+
+
+async def find_similar(post_ids: List, limit: int, topic: Optional[str] = None,
+                       with_payload=True) -> dict:
+    """Nearest posts to each of `post_ids`, using their stored vectors.
+
+    One batched query, no embedding call; Qdrant leaves the source post out
+    of its own results. The ids must exist.
+
+    With chunk multivectors Qdrant's max_sim adds up the best match of every
+    chunk of the source post, so a post with k chunks scores up to k. Scores
+    are divided by k, giving the mean best-chunk similarity, which is on the
+    same scale as a single-vector cosine and comparable across source posts.
+    """
+    query_filter = None
+    if topic:
+        query_filter = Filter(must=[FieldCondition(key="topic", match=MatchValue(value=topic))])
+    counts = await chunk_counts(post_ids) if chunks_enabled else {}
+    responses = await qdrant.query_batch_points(
+        collection_name=COLLECTION_NAME,
+        requests=[
+            QueryRequest(query=post_id, using=dense_vector_name(), filter=query_filter,
+                         limit=limit, with_payload=with_payload)
+            for post_id in post_ids
+        ]
+    )
+    similar = {}
+    for post_id, response in zip(post_ids, responses):
+        count = counts.get(str(post_id), 1)
+        for point in response.points:
+            point.score /= count
+        similar[post_id] = response.points
+    return similar
+
+
+async def existing_ids(post_ids: List[str]) -> set:
+    points = await qdrant.retrieve(
+        collection_name=COLLECTION_NAME,
+        ids=post_ids,
+        with_payload=False,
+        with_vectors=False
+    )
+    return {str(point.id) for point in points}
+
+
+def related_entry(point, score: float) -> dict:
     return {
-        "id": point.id,
+        "id": str(point.id),
         "title": point.payload.get("title", ""),
-        "content": point.payload.get("content", ""),
-        "topic": point.payload.get("topic", "")
+        "topic": point.payload.get("topic", ""),
+        "score": score,
     }
 
 
+async def refresh_related(post_ids: List):
+    """Recompute the `related` payload of `post_ids` and fold them into their neighbours' lists.
+
+    A neighbour's list takes in a new post only if it beats the list's
+    weakest entry, so each write touches a handful of posts rather than the
+    whole collection. Scores are treated as symmetric. That holds exactly
+    for single vectors. For chunk multivectors the score from A to B (A's
+    chunks' mean best match in B) can differ from B to A, so a neighbour's
+    list may keep a score a little off from what a query from it would give.
+    """
+    sources = {
+        str(point.id): point
+        for point in await qdrant.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=post_ids,
+            with_payload=["title", "topic"]
+        )
+    }
+    if not sources:
+        return
+    similar = await find_similar([point.id for point in sources.values()], RELATED_POSTS,
+                                 with_payload=["title", "topic"])
+    related = {
+        str(post_id): [related_entry(point, point.score) for point in points]
+        for post_id, points in similar.items()
+    }
+    source_related = dict(related)
+    neighbour_ids = {entry["id"] for entries in related.values() for entry in entries} - set(related)
+    if neighbour_ids:
+        for neighbour in await qdrant.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=list(neighbour_ids),
+            with_payload=["related"]
+        ):
+            current = neighbour.payload.get("related") or []
+            merged = {entry["id"]: entry for entry in current}
+            for source_id, entries in source_related.items():
+                for entry in entries:
+                    if entry["id"] == str(neighbour.id):
+                        merged[source_id] = related_entry(sources[source_id], entry["score"])
+            best = sorted(merged.values(), key=lambda e: e["score"], reverse=True)[:RELATED_POSTS]
+            if best != current:
+                related[str(neighbour.id)] = best
+    await qdrant.batch_update_points(
+        collection_name=COLLECTION_NAME,
+        update_operations=[
+            SetPayloadOperation(set_payload=SetPayload(payload={"related": entries}, points=[post_id]))
+            for post_id, entries in related.items()
+        ]
+    )
+
+
+def start_related_worker():
+    global related_task
+    if related_task is None or related_task.done():
+        related_task = asyncio.create_task(refresh_pending_related())
+
+
+def schedule_related_refresh(post_ids: List):
+    """Queue posts for a background refresh of their precomputed related posts.
+
+    Past RELATED_QUEUE_SIZE queued posts, one pass over every post replaces
+    the queue, so a burst of writes cannot grow it without bound.
+    """
+    if RELATED_POSTS <= 0 or not post_ids:
+        return
+    if len(related_pending) + len(post_ids) > RELATED_QUEUE_SIZE:
+        schedule_related_rebuild()
+        return
+    related_pending.update(post_ids)
+    start_related_worker()
+
+
+def schedule_related_rebuild():
+    """Queue a refresh of every post's related list, e.g. after a bulk import"""
+    if RELATED_POSTS <= 0:
+        return
+    related_pending.clear()
+    # A pass that has not started yet covers this request too; one under way may be past new posts
+    if (Filter(), None) not in related_stale_filters:
+        related_stale_filters.append((Filter(), None))
+    start_related_worker()
+
+
+def schedule_related_cleanup(deleted_ids: List[str]):
+    """Queue a refresh of every post whose related list points at deleted posts"""
+    if RELATED_POSTS <= 0:
+        return
+    for start in range(0, len(deleted_ids), RELATED_BATCH_SIZE):
+        condition = FieldCondition(key="related[].id",
+                                   match=MatchAny(any=deleted_ids[start:start + RELATED_BATCH_SIZE]))
+        related_stale_filters.append((Filter(must=[condition]), None))
+    if deleted_ids:
+        start_related_worker()
+
+
+async def refresh_pending_related():
+    """Refresh queued posts, then the queued passes one page at a time.
+
+    A batch or page that fails stays queued and is retried after
+    RELATED_RETRY_DELAY.
+    """
+    while related_pending or related_stale_filters:
+        try:
+            if related_pending:
+                batch = [related_pending.pop() for _ in range(min(len(related_pending), RELATED_BATCH_SIZE))]
+                try:
+                    await refresh_related(batch)
+                except Exception:
+                    related_pending.update(batch)
+                    raise
+                continue
+            stale_filter, offset = related_stale_filters[0]
+            points, offset = await qdrant.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=stale_filter,
+                limit=RELATED_BATCH_SIZE,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            if points:
+                await refresh_related([point.id for point in points])
+            # Refreshed posts may drop out of the filter; the offset is a point id, so no page is skipped
+            if offset is None:
+                related_stale_filters.pop(0)
+            else:
+                related_stale_filters[0] = (stale_filter, offset)
+        except Exception as exc:
+            print(f"Refreshing related posts failed ({type(exc).__name__}: {exc}), "
+                  f"retrying in {RELATED_RETRY_DELAY}s")
+            await asyncio.sleep(RELATED_RETRY_DELAY)
+
+
+async def drain_related():
+    """Wait for queued related-post refreshes, e.g. before a script exits"""
+    if related_task is not None:
+        await related_task
+
+
+def embedding_current(existing: Optional[dict], payload: dict) -> bool:
+    """Whether a stored post's vector already matches `payload`'s text and the current model"""
+    return bool(existing and existing.get("content_hash") == content_hash(payload)
+                and existing.get("embedding_model") == EMBED_MODEL)
+
+
+async def save_post(post_id: str, payload: dict, existing: Optional[dict]) -> bool:
+    """Write an edited post, re-embedding only if its text or the model changed.
+
+    Returns whether the vector was recomputed.
+    """
+    if embedding_current(existing, payload):
+        await qdrant.set_payload(
+            collection_name=COLLECTION_NAME,
+            payload=payload,
+            points=[post_id]
+        )
+        bump_generation()
+        # Neighbours' related lists hold copies of the title and topic
+        schedule_related_refresh([post_id])
+        return False
+
+    await upsert_points(await build_points([(post_id, payload)]))
+    return True
+
+
+async def save_posts(posts: List[tuple]):
+    """Write a batch of (id, payload) posts from the write-behind queue.
+
+    Like save_post, but the stored hashes are read in one call, unchanged
+    posts get their payload in one batched update, and the rest are
+    embedded together and upserted in one call. A None payload is a
+    journaled delete.
+    """
+    deleted = [post_id for post_id, payload in posts if payload is None]
+    posts = [(post_id, payload) for post_id, payload in posts if payload is not None]
+    if deleted:
+        await qdrant.delete(collection_name=COLLECTION_NAME, points_selector=deleted)
+        bump_generation()
+        schedule_related_cleanup(deleted)
+    if not posts:
+        return
+    stored = await qdrant.retrieve(
+        collection_name=COLLECTION_NAME,
+        ids=[post_id for post_id, _ in posts],
+        with_payload=["content_hash", "embedding_model"]
+    )
+    existing = {str(point.id): point.payload for point in stored}
+    unchanged = [(post_id, payload) for post_id, payload in posts
+                 if embedding_current(existing.get(post_id), payload)]
+    changed = [(post_id, payload) for post_id, payload in posts
+               if not embedding_current(existing.get(post_id), payload)]
+    if unchanged:
+        await qdrant.batch_update_points(
+            collection_name=COLLECTION_NAME,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[post_id]))
+                for post_id, payload in unchanged
+            ]
+        )
+        bump_generation()
+        schedule_related_refresh([post_id for post_id, _ in unchanged])
+    if changed:
+        await upsert_points(await build_points(changed))
+
+
+def stale_embedding_filter() -> Filter:
+    """Posts embedded by a model other than EMBED_MODEL (or before the model was recorded)"""
+    return Filter(must_not=[
+        FieldCondition(key="embedding_model", match=MatchValue(value=EMBED_MODEL))
+    ])
+
+
+async def reembed_stale_posts():
+    """Re-embed stale posts in batches, pausing REEMBED_INTERVAL between batches"""
+    reembed_status.update(running=True, processed=0, error=None)
+    try:
+        reembed_status["remaining"] = (await qdrant.count(
+            collection_name=COLLECTION_NAME,
+            count_filter=stale_embedding_filter(),
+            exact=True
+        )).count
+        while True:
+            # Re-embedded posts drop out of the filter, so always read from the start
+            points, _ = await qdrant.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=stale_embedding_filter(),
+                limit=REEMBED_BATCH_SIZE,
+                with_payload=list(POST_FIELDS),
+                with_vectors=False
+            )
+            if not points:
+                break
+            await bulk_upsert_points(await build_points([
+                (point.id, {field: point.payload.get(field, "") for field in POST_FIELDS})
+                for point in points
+            ]))
+            reembed_status["processed"] += len(points)
+            reembed_status["remaining"] = max(0, reembed_status["remaining"] - len(points))
+            await asyncio.sleep(REEMBED_INTERVAL)
+    except Exception as exc:
+        reembed_status["error"] = f"{type(exc).__name__}: {exc}"
+    finally:
+        if reembed_status["processed"]:
+            # New vectors change every post's neighbours
+            schedule_related_rebuild()
+        reembed_status["running"] = False
+        reembed_lock.release()
+
+
+@app.post("/api/admin/reembed")
+async def start_reembed():
+    """Start re-embedding posts whose vectors came from an older model"""
+    global reembed_task
+    if not reembed_status["running"]:
+        if not reembed_lock.try_acquire():
+            return {"error": "Re-embedding is already running in another worker"}
+        reembed_status["running"] = True
+        reembed_task = asyncio.create_task(reembed_stale_posts())
+    return {"model": EMBED_MODEL, **reembed_status}
+
+
+@app.get("/api/admin/reembed")
+async def reembed_progress():
+    return {"model": EMBED_MODEL, **reembed_status}
+
+
 @app.post("/api/posts/update")
 async def update_post(post: BlogPost):
     if not post.id:
         return {"error": "Post ID required"}
+    if write_queue is not None:
+        await write_queue.submit(post.id, {"title": post.title, "content": post.content, "topic": post.topic})
+        return {"status": "pending", "id": post.id}
 
-    embedding = get_embedding(f"{post.title} {post.content}")
-
-    qdrant.upsert(
+    result = await qdrant.retrieve(
         collection_name=COLLECTION_NAME,
-        points=[
-            PointStruct(
-                id=post.id,
-                vector=embedding,
-                payload={
-                    "title": post.title,
-                    "content": post.content,
-                    "topic": post.topic
-                }
-            )
-        ]
+        ids=[post.id],
+        with_payload=["content_hash", "embedding_model"]
     )
-    return {"status": "updated", "id": post.id}
+    reembedded = await save_post(post.id, {
+        "title": post.title,
+        "content": post.content,
+        "topic": post.topic
+    }, result[0].payload if result else None)
+    return {"status": "updated", "id": post.id, "reembedded": reembedded}
+
+
+@app.patch("/api/posts/{post_id}")
+async def patch_post(post_id: str, changes: BlogPostPatch):
+    """Update only the given fields of a post"""
+    queued = await write_queue.latest(post_id) if write_queue is not None else None
+    if queued is not None and queued["status"] == "pending":
+        if queued["payload"] is None:
+            return {"error": "Post not found"}
+        # Patch the newest queued version, which Qdrant does not have yet
+        existing = queued["payload"]
+    else:
+        result = await qdrant.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=[post_id],
+            with_payload=True
+        )
+        if not result:
+            return {"error": "Post not found"}
+        existing = result[0].payload
+    payload = {field: existing.get(field, "") for field in POST_FIELDS}
+    payload.update(changes.model_dump(exclude_none=True))
+    if write_queue is not None:
+        await write_queue.submit(post_id, payload)
+        return {"status": "pending", "id": post_id}
+    reembedded = await save_post(post_id, payload, existing)
+    return {"status": "updated", "id": post_id, "reembedded": reembedded}
 
 
 @app.post("/api/posts")
 async def create_post(post: BlogPost):
-    """Create a new blog post"""
+    """Create a new blog post; in write-behind mode it is stored asynchronously"""
     post_id = str(uuid.uuid4())
-    embedding = get_embedding(f"{post.title} {post.content}")
-
-    qdrant.upsert(
-        collection_name=COLLECTION_NAME,
-        points=[
-            PointStruct(
-                id=post_id,
-                vector=embedding,
-                payload={
-                    "title": post.title,
-                    "content": post.content,
-                    "topic": post.topic
-                }
-            )
-        ]
-    )
+    if write_queue is not None:
+        await write_queue.submit(post_id, {"title": post.title, "content": post.content, "topic": post.topic})
+        return {"status": "pending", "id": post_id}
+    await upsert_points(await build_points([(post_id, {
+        "title": post.title,
+        "content": post.content,
+        "topic": post.topic
+    })]))
     return {"status": "created", "id": post_id}
 
 
-@app.get("/api/posts/search/{query}")
-async def search_posts(query: str):
-    """Search blog posts by text"""
-    embedding = get_embedding(query)
+@app.post("/api/posts/bulk")
+async def bulk_import(request: Request, source: Optional[str] = None, skip: int = 0):
+    """Import posts from an NDJSON request body (one post per line).
 
-    results = qdrant.query_points(
-        collection_name=COLLECTION_NAME,
-        query=embedding,
-        limit=10
+    Passing `source` makes point ids deterministic per line, so a failed import
+    can be resent with `skip` set to the returned `committed_lines`. When a
+    batch cannot be embedded or stored the import stops and answers 503 with
+    the same stats and an `error`. Related lists are refreshed by one pass
+    over all posts afterwards rather than per imported post.
+    """
+    try:
+        stats = await import_posts(
+            ndjson_lines(request.stream()),
+            build_points=build_points,
+            upsert=bulk_upsert_points,
+            source=source,
+            skip=skip,
+            batch_size=IMPORT_BATCH_SIZE,
+            upload_workers=IMPORT_UPLOAD_WORKERS,
+        )
+    except ImportFailed as exc:
+        print(f"Bulk import stopped after line {exc.stats.committed_lines}: {exc}")
+        return JSONResponse(status_code=503, content=exc.stats.as_dict())
+    finally:
+        schedule_related_rebuild()
+    return stats.as_dict()
+
+
+@app.get("/api/posts/search/{query}", response_model=List[ScoredPost])
+async def search_posts(
+    query: str,
+    response: Response,
+    topic: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    score_threshold: Optional[float] = None,
+    mode: Literal["hybrid", "dense", "keyword"] = "hybrid",
+    snippet: Optional[int] = Query(None, ge=1),
+):
+    """Search blog posts by text.
+
+    `hybrid` fuses semantic and keyword (BM25) candidates with reciprocal rank
+    fusion inside Qdrant; `dense` and `keyword` use one side only. In hybrid
+    mode `score_threshold` applies to the semantic candidates' similarity.
+    Results are cached per normalized query and parameters until the next write;
+    `snippet` is applied to the cached results, so it does not split the cache.
+
+    When the query cannot be embedded because Ollama is unavailable, hybrid and
+    dense searches fall back to keyword results (not cached) and say so in the
+    X-Search-Mode header.
+    """
+    if not hybrid_enabled:
+        mode = "dense"
+    key = (collection_generation.value, " ".join(query.lower().split()),
+           topic, limit, offset, score_threshold, mode)
+    posts = search_cache.get(key)
+    if posts is None:
+        try:
+            posts = await run_search(query, topic, limit, offset, score_threshold, mode)
+            search_cache.put(key, posts)
+        except OllamaUnavailable:
+            if not hybrid_enabled or mode == "keyword":
+                raise
+            # Similarity thresholds do not carry over to BM25 scores
+            posts = await run_search(query, topic, limit, offset, None, "keyword")
+            response.headers["X-Search-Mode"] = "keyword"
+    return [with_snippet(post, snippet) for post in posts]
+
+
+# Registered after the search route, so /api/posts/search/similar stays a search
+@app.get("/api/posts/{post_id}/similar", response_model=Union[List[ScoredPost], ErrorResponse])
+async def similar_posts(
+    post_id: str,
+    limit: int = Query(5, ge=1, le=100),
+    topic: Optional[str] = None,
+    snippet: Optional[int] = Query(None, ge=1),
+):
+    """Posts closest to this one, found from its stored vector"""
+    if not await existing_ids([post_id]):
+        return {"error": "Post not found"}
+    similar = await find_similar([post_id], limit, topic)
+    return [scored_post(point, snippet) for point in similar[post_id]]
+
+
+@app.post("/api/posts/similar", response_model=Dict[str, List[ScoredPost]])
+async def similar_posts_batch(request: SimilarRequest, snippet: Optional[int] = Query(None, ge=1)):
+    """Similar posts for many ids in one Qdrant round trip; unknown ids map to an empty list"""
+    found = await existing_ids(request.ids)
+    ids = [post_id for post_id in request.ids if post_id in found]
+    similar = await find_similar(ids, request.limit, request.topic) if ids else {}
+    return {
+        post_id: [scored_post(point, snippet) for point in similar.get(post_id, [])]
+        for post_id in request.ids
+    }
+
+
+def dense_vector_name() -> Optional[str]:
+    return CHUNK_VECTOR_NAME if chunks_enabled else None
+
+
+def dense_query(embedding: List[float]):
+    """Query vector for the dense index.
+
+    Against chunk multivectors the query is a one-vector multivector, so each
+    post scores by its best-matching chunk and appears once in the results.
+    """
+    return [embedding] if chunks_enabled else embedding
+
+
+async def run_search(
+    query: str,
+    topic: Optional[str],
+    limit: int,
+    offset: int,
+    score_threshold: Optional[float],
+    mode: str,
+) -> List[ScoredPost]:
+    query_filter = None
+    if topic:
+        query_filter = Filter(must=[FieldCondition(key="topic", match=MatchValue(value=topic))])
+
+    if mode == "keyword":
+        results = await qdrant.query_points(
+            collection_name=COLLECTION_NAME,
+            query=sparse.query_vector(query),
+            using=SPARSE_VECTOR_NAME,
+            query_filter=query_filter,
+            limit=limit,
+            offset=offset,
+            score_threshold=score_threshold,
+        )
+    elif mode == "dense":
+        results = await qdrant.query_points(
+            collection_name=COLLECTION_NAME,
+            query=dense_query(await get_embedding(query)),
+            using=dense_vector_name(),
+            query_filter=query_filter,
+            search_params=collection_profile.search_params(),
+            limit=limit,
+            offset=offset,
+            score_threshold=score_threshold,
+        )
+    else:
+        candidates = (offset + limit) * HYBRID_PREFETCH_FACTOR
+        results = await qdrant.query_points(
+            collection_name=COLLECTION_NAME,
+            prefetch=[
+                Prefetch(
+                    query=dense_query(await get_embedding(query)),
+                    using=dense_vector_name(),
+                    filter=query_filter,
+                    params=collection_profile.search_params(),
+                    score_threshold=score_threshold,
+                    limit=candidates,
+                ),
+                Prefetch(
+                    query=sparse.query_vector(query),
+                    using=SPARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    limit=candidates,
+                ),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=limit,
+            offset=offset,
+        )
+
+    return [scored_post(point) for point in results.points]
+
+
+# Instructions first and the topic last: Ollama reuses the already-evaluated
+# prompt prefix of the previous request, so only the topic is processed anew
+GENERATION_PROMPT_PREFIX = """Write an engaging and informative blog post with a title and content.
+Format: put the title on the first line, then the content after a blank line.
+Topic: """
+
+
+def generation_prompt(topic: str) -> str:
+    return GENERATION_PROMPT_PREFIX + topic
+
+
+def generation_request(prompt: str, stream: bool, **options) -> dict:
+    return {
+        "model": GENERATE_MODEL,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": GENERATE_KEEP_ALIVE,
+        "options": {**GENERATE_OPTIONS, **options},
+    }
+
+
+def generation_key(topic: str) -> tuple:
+    return (GENERATE_MODEL, " ".join(topic.lower().split()), json.dumps(GENERATE_OPTIONS, sort_keys=True))
+
+
+async def warm_up_model():
+    """Load the generation model on every Ollama host and evaluate the prompt prefix.
+
+    A one-token generation moves the cold model load out of the first user
+    request; failures are only logged, generation then loads it on demand.
+    """
+    for host in ollama.hosts:
+        try:
+            async with timed("ollama.generate"):
+                await ollama.attempt(host, "/api/generate",
+                                     generation_request(GENERATION_PROMPT_PREFIX, False, num_predict=1),
+                                     OLLAMA_GENERATE_TIMEOUT)
+            print(f"Loaded {GENERATE_MODEL} on {host.client.base_url}")
+        except httpx.HTTPError as exc:
+            print(f"Could not warm up {GENERATE_MODEL} on {host.client.base_url}: {exc!r}")
+
+
+def queue_full_response() -> JSONResponse:
+    return JSONResponse(
+        {"error": "Generation queue is full", **generation_limiter.stats()},
+        status_code=429,
+        headers={"Retry-After": "10"},
     )
 
-    posts = []
-    for point in results.points:
-        posts.append({
-            "id": point.id,
-            "title": point.payload.get("title", ""),
-            "content": point.payload.get("content", ""),
-            "topic": point.payload.get("topic", ""),
-            "score": point.score
-        })
-    return posts
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def ollama_error_text(response: httpx.Response) -> str:
+    """The error message Ollama put in a failed response, or its raw body."""
+    try:
+        return response.json()["error"]
+    except (ValueError, KeyError, TypeError):
+        return response.text or f"HTTP {response.status_code}"
 
 
 @app.post("/api/generate")
-async def generate_post(request: TopicRequest):
+async def generate_post(request: TopicRequest, response: Response):
+    """Generate a post about a topic.
+
+    Results are cached per model, normalized topic and options, and
+    concurrent requests for the same key share one generation; `fresh`
+    bypasses both and always generates.
+    """
     topic = request.topic
+    key = generation_key(topic)
+    if not request.fresh:
+        cached = generation_cache.get(key)
+        if cached is None and key in generations_in_flight:
+            cached = await asyncio.shield(generations_in_flight[key])
+        if cached is not None:
+            response.headers["X-Generation-Cache"] = "hit"
+            return {**cached, "topic": topic}
 
-    prompt = f"""Write a blog post about {topic}.
-    The post should have a title and content.
-    Make it engaging and informative.
-    Format: put the title on the first line, then the content after a blank line."""
-
-    response = httpx.post(
-        f"{OLLAMA_HOST}/api/generate",
-        json={
-            "model": "llama3.2",
-            "prompt": prompt,
-            "stream": False
-        },
-        timeout=120.0
-    )
+    in_flight = asyncio.get_running_loop().create_future()
+    generations_in_flight.setdefault(key, in_flight)
+    try:
+        try:
+            async with generation_limiter.slot(GENERATE_QUEUE_TIMEOUT), timed("ollama.generate"):
+                result = await ollama.post(
+                    "/api/generate",
+                    json=generation_request(generation_prompt(topic), False),
+                    timeout=OLLAMA_GENERATE_TIMEOUT
+                )
+        except QueueFull:
+            return queue_full_response()
+        except QueueTimeout:
+            return JSONResponse({"error": "Timed out waiting for a generation slot"}, status_code=503)
+        except httpx.HTTPStatusError as e:
+            # Ollama answers a bad request, such as an unknown model, with a 4xx and an error body
+            return JSONResponse({"error": f"Generation failed: {ollama_error_text(e.response)}"}, status_code=502)
 
-    result = response.json()
-    generated_text = result.get("response", "")
+        body = result.json()
+        splitter = TitleContentSplitter()
+        splitter.feed(body.get("response", ""))
+        splitter.finish()
+        post = {"title": splitter.title, "content": splitter.content.strip()}
+        generation_cache.put(key, post)
+        in_flight.set_result(post)
+        return {**post, "topic": topic}
+    finally:
+        # Waiters for a failed generation get None and generate themselves
+        if not in_flight.done():
+            in_flight.set_result(None)
+        if generations_in_flight.get(key) is in_flight:
+            del generations_in_flight[key]
 
-    lines = generated_text.strip().split("\n")
-    title = lines[0].replace("#", "").strip() if lines else "Untitled"
-    content = "\n".join(lines[2:]) if len(lines) > 2 else generated_text
 
-    return {
-        "title": title,
-        "content": content,
-        "topic": topic
-    }
+@app.post("/api/generate/stream")
+async def generate_post_stream(request: TopicRequest):
+    """Generate a post as Server-Sent Events.
+
+    Emits `queued` (with the queue position) while waiting for a slot, then
+    `title` once and `content` deltas as Ollama produces tokens, and finally
+    `done` with the complete post, or `error` if Ollama reports one or the
+    stream ends early. Only a complete post is cached.
+    """
+    topic = request.topic
+    key = generation_key(topic)
+    cached = None if request.fresh else generation_cache.get(key)
+    if cached is not None:
+        return StreamingResponse(
+            iter([sse("title", {"text": cached["title"]}), sse("content", {"text": cached["content"]}),
+                  sse("done", {**cached, "topic": topic})]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Generation-Cache": "hit"},
+        )
+    try:
+        ticket = generation_limiter.enqueue()
+    except QueueFull:
+        return queue_full_response()
+
+    async def events():
+        try:
+            deadline = asyncio.get_running_loop().time() + GENERATE_QUEUE_TIMEOUT
+            while not ticket.done():
+                yield sse("queued", {"position": generation_limiter.position(ticket)})
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    yield sse("error", {"error": "Timed out waiting for a generation slot"})
+                    return
+                try:
+                    await asyncio.wait_for(asyncio.shield(ticket), min(1.0, remaining))
+                except asyncio.TimeoutError:
+                    pass
+
+            splitter = TitleContentSplitter()
+            async with timed("ollama.generate"), ollama.stream(
+                "/api/generate",
+                json=generation_request(generation_prompt(topic), True),
+                timeout=OLLAMA_GENERATE_TIMEOUT
+            ) as response:
+                finished = False
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise OllamaError(chunk["error"])
+                    for event, text in splitter.feed(chunk.get("response", "")):
+                        yield sse(event, {"text": text})
+                    if chunk.get("done"):
+                        finished = True
+                        break
+                if not finished:
+                    raise OllamaError("stream ended before the generation was done")
+            for event, text in splitter.finish():
+                yield sse(event, {"text": text})
+            post = {"title": splitter.title, "content": splitter.content.strip()}
+            generation_cache.put(key, post)
+            yield sse("done", {**post, "topic": topic})
+        except (httpx.HTTPError, OllamaUnavailable, OllamaError) as exc:
+            yield sse("error", {"error": f"Generation failed: {exc}"})
+        finally:
+            generation_limiter.release(ticket)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/health")
 async def health():
+    """Liveness: the process is up and serving requests"""
     return {"status": "ok"}
+
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness: the collection exists and initial seeding has finished"""
+    if not ready:
+        return JSONResponse({"status": "starting", "error": startup_error}, status_code=503)
+    return {"status": "ready"}
+
+
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"))
+CACHE_SIZE = registry.gauge("cache_entries", "Entries held in memory per cache", ("cache",))
+GENERATION_SLOTS = registry.gauge(
+    "generation_requests", "Generation requests running or waiting for a slot", ("state",))
+OLLAMA_CIRCUITS = registry.gauge(
+    "ollama_circuit_open", "1 while requests to an Ollama host are short-circuited", ("host",))
+
+
+def collect_runtime_metrics():
+    for name, cache in (("embedding", embedding_cache), ("search", search_cache),
+                        ("generation", generation_cache)):
+        CACHE_LOOKUPS.set(cache.hits, name, "hit")
+        CACHE_LOOKUPS.set(cache.misses, name, "miss")
+        CACHE_SIZE.set(len(cache), name)
+    GENERATION_SLOTS.set(generation_limiter.active, "active")
+    GENERATION_SLOTS.set(generation_limiter.waiting, "waiting")
+    if ollama is not None:
+        for host in ollama.hosts:
+            OLLAMA_CIRCUITS.set(int(host.breaker.state == "open"), str(host.client.base_url))
+
+
+registry.on_collect(collect_runtime_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, stage and cache metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/generate/queue")
+async def generation_queue():
+    """Generation slots in use and requests waiting for one"""
+    return generation_limiter.stats()
+
+
+@app.get("/api/cache/embeddings")
+async def embedding_cache_stats():
+    """Embedding cache size, hit/miss counters and batching stats"""
+    return {**embedding_cache.stats(), "batching": embedding_batcher.stats()}
+
+
+@app.get("/api/writes")
+async def write_queue_stats():
+    """Write-behind journal: entries by status and the age of the oldest pending write"""
+    if write_queue is None:
+        return {"error": "Write-behind mode is off"}
+    return await write_queue.stats()
+
+
+@app.get("/api/writes/{post_id}")
+async def write_status(post_id: str):
+    """Status of the latest queued write or delete of a post: pending, done, failed or cancelled"""
+    if write_queue is None:
+        return {"error": "Write-behind mode is off"}
+    latest = await write_queue.latest(post_id)
+    if latest is None:
+        return {"error": "No queued write for this post"}
+    latest.pop("payload")
+    return latest
+
+
+@app.get("/api/ollama")
+async def ollama_stats():
+    """Per-host circuit state and load, plus retry and hedging counters"""
+    return ollama.stats()
+
+
+@app.get("/api/cache/generations")
+async def generation_cache_stats():
+    """Generated-post cache size and hit ratio"""
+    return generation_cache.stats()
+
+
+@app.get("/api/cache/search")
+async def search_cache_stats():
+    """Search result cache size and hit ratio"""
+    return {**search_cache.stats(), "generation": collection_generation.value}
@@ -0,0 +1,254 @@
+"""Prometheus-style metrics: counters, gauges and histograms with text exposition.
+
+Deliberately dependency-free; the exposition format is the plain-text one
+Prometheus scrapes from /metrics.
+"""
+import bisect
+import inspect
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str):
+        """Overwrite the value, e.g. to mirror a count kept elsewhere at scrape time"""
+        self.values[labels] = value
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last)], sum
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts, total = self.values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Run `collector` before each scrape, e.g. to copy cache stats into gauges"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served")
+STAGE_LATENCY = registry.histogram(
+    "stage_duration_seconds", "Latency of backend stages (embedding, Qdrant calls, generation)", ("stage",))
+STAGE_ERRORS = registry.counter(
+    "stage_errors_total", "Failed backend stage calls", ("stage",))
+STAGE_IN_FLIGHT = registry.gauge(
+    "stage_in_flight", "Backend stage calls currently running", ("stage",))
+
+
+@asynccontextmanager
+async def timed(stage: str):
+    """Record latency, in-flight count and errors for one stage call"""
+    STAGE_IN_FLIGHT.inc(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+        STAGE_IN_FLIGHT.dec(stage)
+
+
+class InstrumentedClient:
+    """Proxy that times every coroutine method of the wrapped client as `<prefix>.<method>`"""
+
+    def __init__(self, client, prefix: str):
+        self.wrapped = client
+        self.prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if name.startswith("_") or name == "close" or not inspect.iscoroutinefunction(attr):
+            return attr
+        stage = f"{self.prefix}.{name}"
+
+        async def call(*args, **kwargs):
+            async with timed(stage):
+                return await attr(*args, **kwargs)
+
+        return call
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Latency runs until the response body is fully sent, so streamed responses
+    are measured end to end. Routes are labelled by their path template to keep
+    label cardinality bounded.
+    """
+
+    def __init__(self, app, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, route_path)
+            REQUESTS.inc(method, route_path, str(status or 500))
+            REQUESTS_IN_FLIGHT.dec()
+
+
+class ProfilingMiddleware:
+    """Profiles requests sent with `X-Profile: 1` and returns the pyinstrument HTML report.
+
+    The normal response is discarded. Requires the optional `pyinstrument`
+    package and should only be enabled where profiling output may be exposed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (b"x-profile", b"1") not in scope["headers"]:
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        async def discard(message):
+            pass
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+        body = profiler.output_html().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/html; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,173 @@
+"""Rebuild the blog collection under another storage profile while the API keeps serving.
+
+    uv run python migrate_collection.py --profile int8
+    uv run python migrate_collection.py --profile on_disk --hnsw-m 32 --drop-old
+
+Points are copied into a new collection laid out by the profile, catch-up
+passes copy whatever changed during the previous pass until one finds
+nothing, and the `blogposts` alias is then switched to the new collection in
+one atomic operation, so the API keeps serving from the old collection until
+the switch.
+
+A write that lands between the last catch-up pass and the switch is not
+copied; with --drop-old it is lost. Stop writes (e.g. scale the writers down)
+for the duration of the migration when every write must survive.
+
+A collection created before aliases were used (a plain collection named
+`blogposts`) has to be deleted before the alias can take its name; requests
+arriving between those two calls fail.
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    PointStruct,
+)
+
+import main
+from profiles import PROFILES, CollectionProfile, get_profile
+
+
+async def current_collection() -> Optional[str]:
+    """The collection behind the alias, or COLLECTION_NAME itself for a pre-alias collection"""
+    for alias in (await main.qdrant.get_aliases()).aliases:
+        if alias.alias_name == main.COLLECTION_NAME:
+            return alias.collection_name
+    if await main.qdrant.collection_exists(main.COLLECTION_NAME):
+        return main.COLLECTION_NAME
+    return None
+
+
+async def sync_points(source: str, target: str, batch_size: int = 256) -> int:
+    """Make `target` match `source`; returns the number of points copied or deleted.
+
+    Points whose payload already matches are skipped: the payload carries the
+    content hash and embedding model, so an unchanged payload means an
+    unchanged vector. Points missing from `source` are deleted from `target`.
+    """
+    copied = 0
+    seen = set()
+    offset = None
+    while True:
+        points, offset = await main.qdrant.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            seen.update(point.id for point in points)
+            existing = {
+                point.id: point.payload
+                for point in await main.qdrant.retrieve(
+                    collection_name=target,
+                    ids=[point.id for point in points],
+                    with_payload=True,
+                )
+            }
+            changed = [
+                PointStruct(id=point.id, vector=point.vector, payload=point.payload)
+                for point in points
+                if existing.get(point.id) != point.payload
+            ]
+            if changed:
+                await main.qdrant.upsert(collection_name=target, points=changed, wait=True)
+                copied += len(changed)
+        if offset is None:
+            break
+
+    removed = []
+    offset = None
+    while True:
+        points, offset = await main.qdrant.scroll(
+            collection_name=target,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        removed.extend(point.id for point in points if point.id not in seen)
+        if offset is None:
+            break
+    if removed:
+        await main.qdrant.delete(collection_name=target, points_selector=removed, wait=True)
+    return copied + len(removed)
+
+
+async def migrate(profile: CollectionProfile, batch_size: int = 256, drop_old: bool = False,
+                  max_passes: int = 10) -> str:
+    """Copy the collection into a new one laid out by `profile` and point the alias at it.
+
+    Gives up, dropping the new collection, when writes keep arriving faster
+    than `max_passes` catch-up passes can copy them.
+    """
+    source = await current_collection()
+    if source is None:
+        raise RuntimeError(f"Collection {main.COLLECTION_NAME} does not exist; nothing to migrate")
+    info = await main.qdrant.get_collection(source)
+    target = main.versioned_collection_name(profile)
+    # Keep the source's vector layout so points copy over unchanged
+    await main.create_blog_collection(target, profile, info.config.params.sparse_vectors or {},
+                                      chunked=main.has_chunk_vectors(info))
+    print(f"Created {target} ({profile.name} profile)")
+
+    copied = await sync_points(source, target, batch_size)
+    print(f"Copied {copied} points from {source}")
+    for catch_up in range(1, max_passes + 1):
+        changed = await sync_points(source, target, batch_size)
+        print(f"Catch-up pass {catch_up}: {changed} points changed during the previous pass")
+        if not changed:
+            break
+    else:
+        await main.qdrant.delete_collection(target)
+        raise RuntimeError(
+            f"{source} still changed after {max_passes} catch-up passes; "
+            "rerun while writes are stopped"
+        )
+
+    create = CreateAliasOperation(
+        create_alias=CreateAlias(collection_name=target, alias_name=main.COLLECTION_NAME)
+    )
+    if source == main.COLLECTION_NAME:
+        await main.qdrant.delete_collection(source)
+        await main.qdrant.update_collection_aliases(change_aliases_operations=[create])
+    else:
+        await main.qdrant.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=main.COLLECTION_NAME)),
+            create,
+        ])
+        if drop_old:
+            await main.qdrant.delete_collection(source)
+            print(f"Dropped {source}")
+        else:
+            print(f"Kept {source} for rollback; drop it once the new profile is verified")
+    print(f"{main.COLLECTION_NAME} now points at {target}")
+    return target
+
+
+async def run(args):
+    await main.open_clients()
+    try:
+        await migrate(get_profile(args.profile, args.hnsw_m, args.hnsw_ef_construct),
+                      args.batch_size, args.drop_old, args.max_passes)
+    finally:
+        await main.close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the collection under a storage profile")
+    parser.add_argument("--profile", choices=list(PROFILES), required=True)
+    parser.add_argument("--hnsw-m", type=int, help="override the profile's HNSW m")
+    parser.add_argument("--hnsw-ef-construct", type=int, help="override the profile's HNSW ef_construct")
+    parser.add_argument("--batch-size", type=int, default=256, help="points copied per request")
+    parser.add_argument("--max-passes", type=int, default=10,
+                        help="catch-up passes to wait for writes to settle before giving up")
+    parser.add_argument("--drop-old", action="store_true",
+                        help="delete the previous collection after switching the alias")
+    asyncio.run(run(parser.parse_args()))
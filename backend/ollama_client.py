@@ -0,0 +1,220 @@
+"""Ollama access shared by embedding and generation: deadlines, retries, circuit breakers and hedging.
+
+One or more Ollama hosts sit behind an OllamaClient. Every call has an
+overall deadline; failed attempts (connection errors, timeouts, 429 and 5xx)
+are retried with jittered exponential backoff while time remains, each time
+on the least-loaded host whose circuit is closed. A host that keeps failing
+opens its circuit and is skipped until a probe request succeeds, so callers
+fail fast with OllamaUnavailable instead of waiting out timeouts.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import List, Optional
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OllamaUnavailable(Exception):
+    """No Ollama host answered within the deadline, or every host's circuit is open"""
+
+
+class OllamaError(Exception):
+    """Ollama answered, but with an error instead of a result, e.g. mid-stream"""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures.
+
+    While open, one probe request is let through every `reset_after` seconds;
+    a successful probe closes the circuit, a failed one keeps it open.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            # Re-arm so only this request probes until the next interval
+            self.opened_at = self.clock()
+        return state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = self.clock()
+
+
+class OllamaHost:
+    def __init__(self, client: httpx.AsyncClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+        self.in_flight = 0
+
+    def stats(self) -> dict:
+        return {
+            "url": str(self.client.base_url),
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "in_flight": self.in_flight,
+        }
+
+
+class OllamaClient:
+    """Calls to a pool of Ollama hosts.
+
+    `hedge_after` (seconds, 0 disables) sends a second copy of a hedged call
+    to another host when the first has not answered by then, and uses
+    whichever answer arrives first. It is meant for cheap idempotent calls
+    such as embeddings, not generation.
+    """
+
+    def __init__(self, clients: List[httpx.AsyncClient], retries: int = 2, backoff: float = 0.2,
+                 breaker_threshold: int = 5, breaker_reset: float = 30.0, hedge_after: float = 0.0):
+        self.hosts = [OllamaHost(client, CircuitBreaker(breaker_threshold, breaker_reset))
+                      for client in clients]
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.retry_count = 0
+        self.hedge_count = 0
+
+    def pick(self, exclude=()) -> Optional[OllamaHost]:
+        """The least-loaded host whose circuit lets a request through"""
+        candidates = sorted((host for host in self.hosts if host not in exclude),
+                            key=lambda host: host.in_flight)
+        for host in candidates:
+            if host.breaker.allow():
+                return host
+        return None
+
+    async def attempt(self, host: OllamaHost, path: str, json: dict, timeout: float) -> httpx.Response:
+        host.in_flight += 1
+        try:
+            response = await host.client.post(path, json=json, timeout=timeout)
+            if response.status_code in RETRY_STATUSES:
+                response.raise_for_status()
+        except (httpx.HTTPStatusError, httpx.TransportError):
+            host.breaker.record_failure()
+            raise
+        finally:
+            host.in_flight -= 1
+        # Any other answer, including a 4xx for a bad request, means the host is up
+        host.breaker.record_success()
+        response.raise_for_status()
+        return response
+
+    async def hedged(self, host: OllamaHost, path: str, json: dict, timeout: float) -> httpx.Response:
+        tasks = {asyncio.create_task(self.attempt(host, path, json, timeout))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            backup = None if done else self.pick(exclude=(host,))
+            if backup is not None:
+                self.hedge_count += 1
+                tasks.add(asyncio.create_task(
+                    self.attempt(backup, path, json, timeout - self.hedge_after)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+                with suppress(asyncio.CancelledError, httpx.HTTPError):
+                    await task
+
+    async def post(self, path: str, json: dict, timeout: float, hedge: bool = False) -> httpx.Response:
+        """POST to some host, retrying failures until `timeout` seconds have passed.
+
+        Raises OllamaUnavailable when no attempt succeeded; a non-retryable
+        error status (e.g. 404 for an unknown model) is raised as is.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Full jitter keeps retries from several callers from arriving together
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                if loop.time() + delay >= deadline:
+                    break
+                self.retry_count += 1
+                await asyncio.sleep(delay)
+            host = self.pick()
+            if host is None:
+                raise OllamaUnavailable("Circuit open for every Ollama host")
+            remaining = deadline - loop.time()
+            try:
+                if hedge and self.hedge_after and remaining > self.hedge_after:
+                    return await self.hedged(host, path, json, remaining)
+                return await self.attempt(host, path, json, remaining)
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code not in RETRY_STATUSES:
+                    raise
+                error = exc
+            except httpx.TransportError as exc:
+                error = exc
+        raise OllamaUnavailable(f"Ollama did not answer {path}: {error!r}") from error
+
+    @asynccontextmanager
+    async def stream(self, path: str, json: dict, timeout: float):
+        """Open a streaming POST on the least-loaded available host.
+
+        Failures to connect move on to the next host; once the response has
+        started it is not retried, since its tokens may already be forwarded.
+        """
+        tried = []
+        while True:
+            host = self.pick(exclude=tried)
+            if host is None:
+                raise OllamaUnavailable(f"No Ollama host available for {path}")
+            tried.append(host)
+            host.in_flight += 1
+            try:
+                async with host.client.stream("POST", path, json=json, timeout=timeout) as response:
+                    if response.status_code in RETRY_STATUSES:
+                        host.breaker.record_failure()
+                        continue
+                    response.raise_for_status()
+                    yield response
+                host.breaker.record_success()
+                return
+            except httpx.ConnectError:
+                host.breaker.record_failure()
+            except httpx.TransportError:
+                host.breaker.record_failure()
+                raise
+            finally:
+                host.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"retries": self.retry_count, "hedged": self.hedge_count,
+                "hosts": [host.stats() for host in self.hosts]}
+
+    async def aclose(self):
+        for host in self.hosts:
+            await host.client.aclose()
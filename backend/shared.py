@@ -0,0 +1,194 @@
+"""Cross-process coordination for running several API workers on one host.
+
+Workers share a directory (SHARED_STATE_DIR) holding lock files, a
+memory-mapped write counter and job progress files. Without it every helper
+here degrades to a process-local equivalent, so single-process deployments
+need no setup.
+"""
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+COUNTER = struct.Struct("<Q")
+
+
+class FileLock:
+    """Exclusive advisory lock on `path` (flock), or a no-op lock when `path` is None"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self.path is None:
+            return True
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def acquire(self, poll: float = 0.1):
+        """Wait for the lock without blocking the event loop; cancellable"""
+        while not self.try_acquire():
+            await asyncio.sleep(poll)
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class SharedSlots:
+    """A fixed number of slots shared by every process, one lock file per slot.
+
+    A process holding a slot holds that file's flock, so a worker that dies
+    gives its slots back with its file descriptors.
+    """
+
+    def __init__(self, paths: List[str]):
+        self.locks = [FileLock(path) for path in paths]
+
+    def try_acquire(self) -> Optional[FileLock]:
+        """A free slot's lock, now held, or None when every slot is taken"""
+        for lock in self.locks:
+            if not lock.held and lock.try_acquire():
+                return lock
+        return None
+
+
+class SharedCounter:
+    """Monotonic counter every process sees, kept in a small memory-mapped file.
+
+    With `path` None it is a plain in-process integer. Increments take an
+    exclusive flock so concurrent writers never lose an update; reads are a
+    single aligned 8-byte load from the shared mapping.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._local = 0
+        self._fd: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+
+    def _map(self) -> mmap.mmap:
+        if self._mmap is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size < COUNTER.size:
+                    os.ftruncate(fd, COUNTER.size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._mmap = mmap.mmap(fd, COUNTER.size)
+        return self._mmap
+
+    @property
+    def value(self) -> int:
+        if self.path is None:
+            return self._local
+        return COUNTER.unpack_from(self._map(), 0)[0]
+
+    def increment(self) -> int:
+        if self.path is None:
+            self._local += 1
+            return self._local
+        shared = self._map()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            value = COUNTER.unpack_from(shared, 0)[0] + 1
+            COUNTER.pack_into(shared, 0, value)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return value
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class JobStore:
+    """Progress of background jobs by id, dropped `ttl` seconds after the last update.
+
+    With `directory` set each job is a JSON file there, replaced atomically on
+    every update, so any worker can answer a poll for a job another worker
+    runs. With `directory` None jobs are kept in this process.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl: float = 3600):
+        self.directory = directory
+        self.ttl = ttl
+        self._local: Dict[str, tuple] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def put(self, job_id: str, job: dict):
+        if self.directory is None:
+            self.prune()
+            self._local[job_id] = (time.time(), dict(job))
+            return
+        path = self._path(job_id)
+        if not os.path.exists(path):
+            self.prune()
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            json.dump(job, f)
+        os.replace(temp, path)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        # Ids come from request paths; anything but a plain token cannot name a job file
+        if not job_id.isalnum():
+            return None
+        if self.directory is None:
+            updated, job = self._local.get(job_id, (0, None))
+            return dict(job) if job is not None and time.time() - updated < self.ttl else None
+        try:
+            if time.time() - os.path.getmtime(self._path(job_id)) >= self.ttl:
+                return None
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def prune(self):
+        cutoff = time.time() - self.ttl
+        if self.directory is None:
+            for job_id in [job_id for job_id, (updated, _) in self._local.items() if updated < cutoff]:
+                del self._local[job_id]
+            return
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
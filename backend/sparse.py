@@ -0,0 +1,48 @@
+"""BM25-style sparse vectors for keyword search.
+
+Documents are encoded with saturated, length-normalised term frequencies;
+Qdrant applies the IDF part at query time (Modifier.IDF on the sparse vector),
+so the collection statistics never have to be computed client-side. Tokens
+are mapped to indices with crc32, which keeps the encoding stateless.
+"""
+import re
+import zlib
+from collections import Counter
+from typing import List
+
+from qdrant_client.models import SparseVector
+
+K1 = 1.2
+B = 0.75
+AVG_DOC_LENGTH = 200  # tokens; typical post length, used for length normalisation
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how in into is it its of on or
+so that the their them there these this to was were what when which who why
+will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode())
+
+
+def document_vector(text: str) -> SparseVector:
+    tokens = tokenize(text)
+    norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_LENGTH)
+    weights = {}
+    for token, tf in Counter(tokens).items():
+        index = token_index(token)
+        # Hash collisions just merge the two terms' weights
+        weights[index] = weights.get(index, 0.0) + tf * (K1 + 1) / (tf + norm)
+    return SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def query_vector(text: str) -> SparseVector:
+    indices = sorted({token_index(token) for token in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
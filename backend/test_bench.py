@@ -0,0 +1,69 @@
+"""Tests for the load benchmark harness"""
+from collections import Counter
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import bench
+import main
+from ollama_client import OllamaClient
+
+
+def result(rps=100.0, p95=10.0, embed_calls=10, errors=0):
+    return {"rps": rps, "p50_ms": 5.0, "p95_ms": p95, "p99_ms": 20.0,
+            "embed_calls": embed_calls, "errors": errors}
+
+
+def test_regressions_against_baseline():
+    baseline = {"search": result()}
+    assert bench.regressions({"search": result(rps=90.0, p95=12.0)}, baseline, 0.25) == []
+    found = bench.regressions({"search": result(rps=50.0, embed_calls=20)}, baseline, 0.25)
+    assert len(found) == 2
+    assert bench.regressions({"new-scenario": result(rps=1.0)}, baseline, 0.25) == []
+
+
+@pytest.mark.parametrize("store", ["memory", "local"])
+async def test_scenario_runs_in_process(store):
+    calls = Counter()
+    main.ollama = OllamaClient([httpx.AsyncClient(base_url="http://ollama",
+                                                  transport=bench.fake_ollama(0, 0, calls))])
+    args = bench.parse_args(["--requests", "30", "--posts", "12", "--concurrency", "4"])
+    # run_scenario swaps in fresh caches and sets the collection flags; restore them afterwards
+    with patch.object(main, 'embedding_cache', main.embedding_cache), \
+            patch.object(main, 'search_cache', main.search_cache), \
+            patch.object(main, 'generation_cache', main.generation_cache), \
+            patch.object(main, 'hybrid_enabled', False), patch.object(main, 'chunks_enabled', False):
+        try:
+            outcome = await bench.run_scenario("mixed", args, calls, store)
+        finally:
+            await main.close_clients()
+
+    assert outcome["requests"] == 30 and outcome["errors"] == 0
+    assert outcome["embed_calls"] > 0
+    assert sum(stats["count"] for stats in outcome["operations"].values()) == 30
+
+
+def test_store_defaults():
+    assert bench.parse_args([]).stores == ["memory"]
+    assert bench.parse_args(["--qdrant-path", "/tmp/q"]).stores == ["local"]
+    assert bench.parse_args(["--stores", "memory", "qdrant"]).stores == ["memory", "qdrant"]
+
+
+async def test_every_store_generates():
+    calls = Counter()
+    main.ollama = OllamaClient([httpx.AsyncClient(base_url="http://ollama",
+                                                  transport=bench.fake_ollama(0, 0, calls))])
+    args = bench.parse_args(["--requests", "4", "--posts", "4", "--stores", "memory", "local"])
+    with patch.object(main, 'embedding_cache', main.embedding_cache), \
+            patch.object(main, 'search_cache', main.search_cache), \
+            patch.object(main, 'generation_cache', main.generation_cache), \
+            patch.object(main, 'hybrid_enabled', False), patch.object(main, 'chunks_enabled', False):
+        try:
+            outcomes = [await bench.run_scenario("search-under-generation", args, calls, store)
+                        for store in args.stores]
+        finally:
+            await main.close_clients()
+
+    # Each store runs its own generations rather than hitting the first one's cache
+    assert [outcome["generate_calls"] for outcome in outcomes] == [4, 4]
@@ -0,0 +1,21 @@
+"""Tests for splitting posts into overlapping chunks"""
+from chunking import chunk_words, post_chunks
+
+
+def test_chunk_words_overlap():
+    text = " ".join(str(i) for i in range(10))
+    assert chunk_words(text, size=4, overlap=1) == ["0 1 2 3", "3 4 5 6", "6 7 8 9"]
+    assert chunk_words(text, size=20, overlap=5) == [text]
+
+
+def test_short_post_is_one_chunk_with_the_whole_text():
+    assert post_chunks("Title", "Short content", size=10) == ["Title Short content"]
+
+
+def test_long_post_chunks_carry_the_title():
+    content = " ".join(f"w{i}" for i in range(25))
+    chunks = post_chunks("Title", content, size=10, overlap=2)
+    assert len(chunks) == 3
+    assert all(chunk.startswith("Title w") for chunk in chunks)
+    assert chunks[1].split()[1] == "w8"
+    assert len(post_chunks("Title", content, size=10, overlap=2, max_chunks=2)) == 2
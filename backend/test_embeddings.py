@@ -0,0 +1,101 @@
+"""Tests for the embedding cache and batcher"""
+import asyncio
+import pytest
+from array import array
+from embeddings import DiskEmbeddingStore, EmbeddingBatcher, EmbeddingCache, cache_key
+
+
+def test_cache_key_depends_on_model_and_text():
+    assert cache_key("m", "text") == cache_key("m", "text")
+    assert cache_key("m", "text") != cache_key("other", "text")
+    assert cache_key("m", "text") != cache_key("m", "text ")
+
+
+def test_lru_eviction_and_counters():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("m", "a", [1.0, 2.0])
+    cache.put("m", "b", [3.0, 4.0])
+    assert cache.get("m", "a") == [1.0, 2.0]  # "a" is now most recent
+    cache.put("m", "c", [5.0, 6.0])  # evicts "b"
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "c") == [5.0, 6.0]
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_disk_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "embeddings.bin")
+    cache = EmbeddingCache(max_size=10, disk=DiskEmbeddingStore(path, dim=2))
+    cache.put("m", "a", [0.5, 0.25])
+    cache.disk.close()
+
+    reopened = EmbeddingCache(max_size=10, disk=DiskEmbeddingStore(path, dim=2))
+    assert reopened.get("m", "a") == [0.5, 0.25]
+    assert len(reopened) == 1  # promoted into memory
+    reopened.disk.close()
+
+
+def test_disk_store_shared_between_processes(tmp_path):
+    path = str(tmp_path / "embeddings.bin")
+    writer, reader = DiskEmbeddingStore(path, dim=2), DiskEmbeddingStore(path, dim=2)
+    writer.put(cache_key("m", "a"), array("f", [0.5, 0.25]))
+    reader.put(cache_key("m", "b"), array("f", [1.0, 2.0]))
+    writer.put(cache_key("m", "a"), array("f", [0.5, 0.25]))
+
+    assert list(reader.get(cache_key("m", "a"))) == [0.5, 0.25]
+    assert list(writer.get(cache_key("m", "b"))) == [1.0, 2.0]
+    assert len(writer) == len(reader) == 2
+    writer.close()
+    reader.close()
+    reopened = DiskEmbeddingStore(path, dim=2)
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_disk_store_drops_partial_record(tmp_path):
+    path = str(tmp_path / "embeddings.bin")
+    store = DiskEmbeddingStore(path, dim=2)
+    store.put(cache_key("m", "a"), array("f", [1.0, 2.0]))
+    store.close()
+    with open(path, "ab") as f:
+        f.write(b"partial")
+
+    store = DiskEmbeddingStore(path, dim=2)
+    assert len(store) == 1
+    store.put(cache_key("m", "b"), array("f", [3.0, 4.0]))
+    assert store.get(cache_key("m", "b")).tolist() == [3.0, 4.0]
+    store.close()
+
+
+def test_disk_store_rejects_dimension_mismatch(tmp_path):
+    path = str(tmp_path / "embeddings.bin")
+    DiskEmbeddingStore(path, dim=2).close()
+    with pytest.raises(ValueError):
+        DiskEmbeddingStore(path, dim=3)
+
+
+async def test_batcher_coalesces_concurrent_requests():
+    calls = []
+
+    async def fetch(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(fetch, max_batch=3, window=0.01)
+    results = await asyncio.gather(*(batcher.embed(t) for t in ["a", "bb", "a", "ccc", "dddd"]))
+
+    assert results == [[1.0], [2.0], [1.0], [3.0], [4.0]]
+    assert calls == [["a", "bb", "ccc"], ["dddd"]]
+    assert batcher.stats()["batches"] == 2
+
+
+async def test_batcher_propagates_errors_to_every_caller():
+    async def fetch(texts):
+        raise RuntimeError("ollama down")
+
+    batcher = EmbeddingBatcher(fetch, window=0.001)
+    results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
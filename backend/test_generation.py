@@ -0,0 +1,86 @@
+"""Tests for generation splitting and queueing"""
+import asyncio
+
+import pytest
+from generation import GenerationLimiter, QueueFull, QueueTimeout, TitleContentSplitter
+from shared import SharedSlots
+
+
+def run_splitter(tokens):
+    splitter = TitleContentSplitter()
+    events = []
+    for token in tokens:
+        events.extend(splitter.feed(token))
+    events.extend(splitter.finish())
+    return splitter, events
+
+
+def test_splitter_emits_title_then_content_deltas():
+    splitter, events = run_splitter(["\n# My ", "Title\n", "\nFirst ", "para.\n\nSecond."])
+    assert events == [("title", "My Title"), ("content", "First "), ("content", "para.\n\nSecond.")]
+    assert splitter.content == "First para.\n\nSecond."
+
+
+def test_splitter_single_line_response():
+    splitter, events = run_splitter(["Only a title"])
+    assert splitter.title == "Only a title"
+    assert events[0] == ("title", "Only a title")
+
+
+async def test_limiter_queues_in_fifo_order_and_hands_off():
+    limiter = GenerationLimiter(concurrency=1, max_queue=2)
+    first = limiter.enqueue()
+    second = limiter.enqueue()
+    third = limiter.enqueue()
+    assert first.done() and not second.done()
+    assert limiter.position(second) == 1 and limiter.position(third) == 2
+
+    with pytest.raises(QueueFull):
+        limiter.enqueue()
+
+    limiter.release(second)  # gives up its place while waiting
+    assert limiter.position(third) == 1
+    limiter.release(first)
+    assert third.done()
+    assert limiter.active == 1
+    limiter.release(third)
+    assert limiter.active == 0
+
+
+async def test_limiters_share_slots_across_processes(tmp_path):
+    # Two limiters stand in for two workers sharing one slot file
+    paths = [str(tmp_path / "generate-0.lock")]
+    first = GenerationLimiter(concurrency=1, max_queue=1, slots=SharedSlots(paths), poll=0.01)
+    second = GenerationLimiter(concurrency=1, max_queue=1, slots=SharedSlots(paths), poll=0.01)
+    holder = first.enqueue()
+    await asyncio.wait_for(holder, 1)
+
+    waiter = second.enqueue()
+    await asyncio.sleep(0.05)
+    assert not waiter.done() and second.position(waiter) == 1
+    first.release(holder)
+    await asyncio.wait_for(waiter, 1)
+    second.release(waiter)
+    assert first.active == 0 and second.active == 0
+
+    # A ticket given up while waiting for the shared slot frees its local slot
+    holder = first.enqueue()
+    await asyncio.wait_for(holder, 1)
+    with pytest.raises(QueueTimeout):
+        async with second.slot(timeout=0.05):
+            pass
+    await asyncio.sleep(0.05)
+    assert second.active == 0
+    first.release(holder)
+
+
+async def test_limiter_slot_times_out():
+    limiter = GenerationLimiter(concurrency=1, max_queue=1)
+    holder = limiter.enqueue()
+    with pytest.raises(QueueTimeout):
+        async with limiter.slot(timeout=0.01):
+            pass
+    assert limiter.waiting == 0
+    limiter.release(holder)
+    async with limiter.slot(timeout=0.01):
+        assert limiter.active == 1
@@ -0,0 +1,90 @@
+"""Tests for the streaming bulk import pipeline"""
+import json
+
+import pytest
+
+from ingest import Checkpoint, ImportFailed, file_lines, import_posts, ndjson_lines, parse_post
+
+
+async def records(lines):
+    for line_no, line in enumerate(lines, start=1):
+        yield line_no, line
+
+
+def post(i):
+    return json.dumps({"title": f"Post {i}", "content": f"Content {i}", "topic": "test"})
+
+
+async def build_points(posts):
+    return [post_id for post_id, _ in posts]
+
+
+async def test_import_batches_and_reports_failures():
+    upserted = []
+
+    async def upsert(points):
+        upserted.append(points)
+
+    lines = [post(i) for i in range(5)] + ["not json", json.dumps({"title": "no content"}), b"\xff\xfe"]
+    stats = await import_posts(records(lines), build_points=build_points, upsert=upsert,
+                               source="test", batch_size=2, upload_workers=2)
+
+    assert stats.rows == 8
+    assert stats.imported == 5
+    assert stats.failed == 3
+    assert stats.committed_lines == 8
+    assert "line 8" in stats.errors[-1]
+    assert sorted(len(chunk) for chunk in upserted) == [1, 2, 2]
+
+
+async def test_import_resumes_from_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "import.checkpoint"))
+    lines = [post(i) for i in range(6)]
+    calls = 0
+
+    async def flaky_upsert(points):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("qdrant unavailable")
+
+    with pytest.raises(ImportFailed) as failed:
+        await import_posts(records(lines), build_points=build_points, upsert=flaky_upsert,
+                           source="test", batch_size=2, upload_workers=1, checkpoint=checkpoint)
+    assert failed.value.stats.committed_lines == 2
+    assert "qdrant unavailable" in failed.value.stats.error
+    assert Checkpoint(checkpoint.path).line == 2
+
+    resumed = []
+
+    async def upsert(points):
+        resumed.extend(points)
+
+    stats = await import_posts(records(lines), build_points=build_points, upsert=upsert,
+                               source="test", batch_size=2, checkpoint=Checkpoint(checkpoint.path))
+    assert stats.rows == 4
+    assert resumed == [parse_post(json.loads(line), "test", n)[0] for n, line in enumerate(lines, 1)][2:]
+
+
+def test_parse_post_ids_are_deterministic_per_source_line():
+    record = {"title": "t", "content": "c"}
+    assert parse_post(record, "file", 3)[0] == parse_post(record, "file", 3)[0]
+    assert parse_post(record, "file", 3)[0] != parse_post(record, "file", 4)[0]
+    assert parse_post({**record, "id": "explicit"}, "file", 3)[0] == "explicit"
+
+
+async def test_ndjson_lines_handles_split_chunks():
+    async def chunks():
+        yield b'{"a": 1}\n{"b"'
+        yield b': 2}\n{"c": 3}'
+
+    assert [line async for line in ndjson_lines(chunks())] == [
+        (1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b'{"c": 3}')
+    ]
+
+
+async def test_file_lines_reads_csv(tmp_path):
+    path = tmp_path / "posts.csv"
+    path.write_text("title,content,topic\nHello,World,misc\n")
+    rows = [json.loads(line) async for _, line in file_lines(str(path), "csv")]
+    assert rows == [{"title": "Hello", "content": "World", "topic": "misc"}]
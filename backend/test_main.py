@@ -1,22 +1,36 @@
 """Basic tests for the blog post API"""
+import asyncio
+import httpx
+import json
 import pytest
+import time
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from main import app
+from result_cache import ResultCache
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    # Related-list refreshes queued here would retry against a mock that is gone by then
+    with patch('main.search_cache', ResultCache()), patch('main.generation_cache', ResultCache()), \
+            patch('main.related_pending', set()), patch('main.related_stale_filters', []), \
+            patch('main.related_task', None):
+        yield
+
+
 @pytest.fixture
 def mock_qdrant():
-    with patch('main.qdrant') as mock:
+    with patch('main.qdrant', new_callable=AsyncMock) as mock:
         yield mock
 
 
 @pytest.fixture
 def mock_embedding():
-    with patch('main.get_embedding') as mock:
-        mock.return_value = [0.1] * 768
+    with patch('main.get_embeddings') as mock:
+        mock.side_effect = lambda texts: [[0.1] * 768 for _ in texts]
         yield mock
 
 
@@ -41,6 +55,84 @@ def test_get_all_posts(mock_qdrant):
     posts = response.json()
     assert len(posts) == 1
     assert posts[0]["title"] == "Test Title"
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_all_posts_pagination(mock_qdrant):
+    mock_point = MagicMock()
+    mock_point.id = "test-id"
+    mock_point.payload = {"title": "Test Title", "topic": "test"}
+    next_id = "6f1c9a3e-0000-4000-8000-000000000000"
+    mock_qdrant.scroll.return_value = ([mock_point], next_id)
+
+    response = client.get("/api/posts?limit=1&fields=title,topic")
+    assert response.status_code == 200
+    assert response.json() == [{"id": "test-id", "title": "Test Title", "topic": "test"}]
+    assert mock_qdrant.scroll.await_args.kwargs["with_payload"] == ["title", "topic"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    client.get(f"/api/posts?limit=1&cursor={cursor}")
+    assert mock_qdrant.scroll.await_args.kwargs["offset"] == next_id
+
+    response = client.get("/api/posts?cursor=not-a-cursor")
+    assert response.json() == {"error": "Invalid cursor"}
+
+
+def test_snippet_text_cuts_at_word_boundary():
+    from main import snippet_text
+    assert snippet_text("short text", 20) == "short text"
+    assert snippet_text("one two three four", 10) == "one two…"
+    assert snippet_text("unbreakableword", 5) == "unbre…"
+
+
+def test_list_and_search_snippets(mock_qdrant, mock_embedding):
+    mock_point = MagicMock()
+    mock_point.id = "test-id"
+    mock_point.payload = {"title": "Long", "content": "word " * 100, "topic": "test"}
+    mock_point.score = 0.5
+    mock_qdrant.scroll.return_value = ([mock_point], None)
+    mock_qdrant.query_points.return_value = MagicMock(points=[mock_point])
+
+    posts = client.get("/api/posts?snippet=12").json()
+    assert posts[0]["content"] == "word word…"
+    assert client.get("/api/posts/search/word?snippet=12").json()[0]["content"] == "word word…"
+    # The cached full result still serves requests without a snippet
+    assert len(client.get("/api/posts/search/word").json()[0]["content"]) == 500
+    assert mock_qdrant.query_points.await_count == 1
+    assert client.get("/api/posts?snippet=0").status_code == 422
+
+
+def test_large_responses_compressed(mock_qdrant):
+    points = []
+    for i in range(20):
+        point = MagicMock()
+        point.id = f"id-{i}"
+        point.payload = {"title": f"Title {i}", "content": "Content " * 50, "topic": "test"}
+        points.append(point)
+    mock_qdrant.scroll.return_value = (points, None)
+
+    response = client.get("/api/posts", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 20
+
+    mock_qdrant.scroll.return_value = (points[:1], None)
+    response = client.get("/api/posts?fields=title", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_export_posts_streams_all_pages(mock_qdrant):
+    pages = []
+    for i in range(3):
+        point = MagicMock()
+        point.id = f"id-{i}"
+        point.payload = {"title": f"Title {i}", "content": "Content", "topic": "test"}
+        pages.append(([point], f"id-{i + 1}" if i < 2 else None))
+    mock_qdrant.scroll.side_effect = pages
+
+    response = client.get("/api/posts/export")
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [post["id"] for post in lines] == ["id-0", "id-1", "id-2"]
 
 
 def test_get_single_post(mock_qdrant):
@@ -89,6 +181,65 @@ def test_update_post(mock_qdrant, mock_embedding):
     assert response.json()["status"] == "updated"
 
 
+def stored_post(**payload):
+    import main
+    point = MagicMock()
+    point.id = "test-id"
+    point.payload = {"title": "Title", "content": "Content", "topic": "old", **payload}
+    point.payload.setdefault("content_hash", main.content_hash(point.payload))
+    point.payload.setdefault("embedding_model", main.EMBED_MODEL)
+    return point
+
+
+def test_update_post_only_topic_changed_skips_embedding(mock_qdrant, mock_embedding):
+    mock_qdrant.retrieve.return_value = [stored_post()]
+    response = client.post("/api/posts/update", json={
+        "id": "test-id", "title": "Title", "content": "Content", "topic": "new"
+    })
+    assert response.json()["reembedded"] is False
+    mock_embedding.assert_not_awaited()
+    mock_qdrant.upsert.assert_not_awaited()
+    assert mock_qdrant.set_payload.await_args.kwargs["payload"]["topic"] == "new"
+
+
+def test_update_post_content_changed_reembeds(mock_qdrant, mock_embedding):
+    mock_qdrant.retrieve.return_value = [stored_post()]
+    response = client.post("/api/posts/update", json={
+        "id": "test-id", "title": "Title", "content": "New content", "topic": "old"
+    })
+    assert response.json()["reembedded"] is True
+    mock_embedding.assert_awaited_once()
+    payload = mock_qdrant.upsert.await_args.kwargs["points"][0].payload
+    assert payload["embedding_model"] == "nomic-embed-text"
+
+
+def test_patch_post_merges_fields(mock_qdrant, mock_embedding):
+    mock_qdrant.retrieve.return_value = [stored_post()]
+    response = client.patch("/api/posts/test-id", json={"topic": "new"})
+    assert response.json() == {"status": "updated", "id": "test-id", "reembedded": False}
+    payload = mock_qdrant.set_payload.await_args.kwargs["payload"]
+    assert payload == {"title": "Title", "content": "Content", "topic": "new"}
+
+
+def test_patch_missing_post(mock_qdrant):
+    mock_qdrant.retrieve.return_value = []
+    assert client.patch("/api/posts/missing", json={"topic": "x"}).json() == {"error": "Post not found"}
+
+
+async def test_reembed_stale_posts(mock_qdrant):
+    import main
+    stale = stored_post(embedding_model="old-model")
+    mock_qdrant.count.return_value = MagicMock(count=1)
+    mock_qdrant.scroll.side_effect = [([stale], None), ([], None)]
+    with patch('main.get_embeddings', AsyncMock(return_value=[[0.1] * 768])), \
+            patch('main.REEMBED_INTERVAL', 0):
+        await main.reembed_stale_posts()
+
+    assert main.reembed_status == {"running": False, "processed": 1, "remaining": 0, "error": None}
+    point = mock_qdrant.upsert.await_args.kwargs["points"][0]
+    assert point.payload["embedding_model"] == main.EMBED_MODEL
+
+
 def test_update_post_without_id():
     response = client.post("/api/posts/update", json={
         "title": "Updated Post",
@@ -100,9 +251,56 @@ def test_update_post_without_id():
 
 
 def test_delete_post(mock_qdrant):
-    response = client.get("/api/posts/delete/test-id")
+    response = client.delete("/api/posts/test-id")
     assert response.status_code == 200
     assert response.json()["status"] == "deleted"
+    assert client.get("/api/posts/delete/test-id").status_code == 404
+
+
+def test_bulk_delete_answers_before_applying_the_delete(mock_qdrant):
+    mock_qdrant.count.return_value = MagicMock(count=3)
+    with patch('main.watch_bulk_delete', AsyncMock()) as watch:
+        response = client.post("/api/posts/bulk-delete", json={"topic": "generated"})
+
+    job = response.json()
+    assert job["status"] == "pending" and job["matched"] == 3 and job["operation_id"] is None
+    watch.assert_awaited_once()
+    mock_qdrant.scroll.assert_not_awaited()
+    mock_qdrant.delete.assert_not_awaited()
+    assert client.get(f"/api/posts/bulk-delete/{job['id']}").json() == job
+
+
+def test_bulk_delete_requires_a_selector(mock_qdrant):
+    assert "error" in client.post("/api/posts/bulk-delete", json={}).json()
+    mock_qdrant.delete.assert_not_awaited()
+    assert client.get("/api/posts/bulk-delete/unknown").json() == {"error": "Delete job not found"}
+
+
+async def test_watch_bulk_delete_until_nothing_matches(mock_qdrant):
+    import main
+    mock_qdrant.delete.return_value = MagicMock(operation_id=7)
+    mock_qdrant.scroll.return_value = ([MagicMock(id="a"), MagicMock(id="b")], None)
+    mock_qdrant.count.side_effect = [MagicMock(count=2), MagicMock(count=0)]
+    job = {"id": "f00d", "status": "pending", "operation_id": None, "remaining": 2}
+    generation = main.collection_generation.value
+    with patch('main.BULK_DELETE_POLL_INTERVAL', 0), \
+            patch('main.schedule_related_cleanup') as cleanup:
+        await main.watch_bulk_delete(job, main.BulkDeleteRequest(topic="generated"))
+    assert job == {"id": "f00d", "status": "completed", "operation_id": 7, "remaining": 0}
+    assert main.delete_jobs.get("f00d") == job
+    kwargs = mock_qdrant.delete.await_args.kwargs
+    assert kwargs["wait"] is False
+    assert kwargs["points_selector"].filter.must[0].match.value == "generated"
+    cleanup.assert_called_once_with(["a", "b"])
+    assert main.collection_generation.value == generation + 2
+
+
+def test_related_cleanup_is_chunked():
+    import main
+    with patch('main.related_stale_filters', []) as filters, patch('main.RELATED_BATCH_SIZE', 2), \
+            patch('main.start_related_worker'):
+        main.schedule_related_cleanup(["a", "b", "c"])
+    assert [f.must[0].match.any for f, offset in filters] == [["a", "b"], ["c"]]
 
 
 def test_search_posts(mock_qdrant, mock_embedding):
@@ -123,3 +321,367 @@ def test_search_posts(mock_qdrant, mock_embedding):
     posts = response.json()
     assert len(posts) == 1
     assert posts[0]["score"] == 0.95
+
+
+def test_search_for_similar_is_not_a_similar_posts_lookup(mock_qdrant, mock_embedding):
+    mock_response = MagicMock()
+    mock_response.points = []
+    mock_qdrant.query_points.return_value = mock_response
+
+    response = client.get("/api/posts/search/similar")
+    assert response.status_code == 200
+    assert response.json() == []
+    mock_qdrant.query_points.assert_awaited_once()
+    mock_qdrant.query_batch_points.assert_not_called()
+
+
+def test_search_posts_hybrid_with_topic_filter(mock_qdrant, mock_embedding):
+    mock_response = MagicMock()
+    mock_response.points = []
+    mock_qdrant.query_points.return_value = mock_response
+
+    with patch('main.hybrid_enabled', True):
+        response = client.get("/api/posts/search/python?topic=programming&limit=5&offset=5")
+
+    assert response.status_code == 200
+    kwargs = mock_qdrant.query_points.await_args.kwargs
+    assert kwargs["limit"] == 5 and kwargs["offset"] == 5
+    dense, keyword = kwargs["prefetch"]
+    assert keyword.using == "bm25"
+    assert dense.filter.must[0].match.value == "programming"
+
+
+def test_search_posts_keyword_mode_skips_embedding(mock_qdrant, mock_embedding):
+    mock_response = MagicMock()
+    mock_response.points = []
+    mock_qdrant.query_points.return_value = mock_response
+
+    with patch('main.hybrid_enabled', True):
+        response = client.get("/api/posts/search/python?mode=keyword")
+
+    assert response.status_code == 200
+    mock_embedding.assert_not_awaited()
+    assert mock_qdrant.query_points.await_args.kwargs["using"] == "bm25"
+
+
+def test_search_results_cached_until_write(mock_qdrant, mock_embedding):
+    mock_point = MagicMock()
+    mock_point.id = "test-id"
+    mock_point.payload = {"title": "Test Title", "content": "Test Content", "topic": "test"}
+    mock_point.score = 0.95
+    mock_qdrant.query_points.return_value = MagicMock(points=[mock_point])
+
+    client.get("/api/posts/search/Test  Query")
+    client.get("/api/posts/search/test query")
+    assert mock_qdrant.query_points.await_count == 1
+
+    client.delete("/api/posts/test-id")
+    mock_qdrant.query_points.return_value = MagicMock(points=[])
+    response = client.get("/api/posts/search/test query")
+    assert mock_qdrant.query_points.await_count == 2
+    assert response.json() == []
+
+    stats = client.get("/api/cache/search").json()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def ollama_transport(handler, **options):
+    from ollama_client import OllamaClient
+    return OllamaClient([httpx.AsyncClient(base_url="http://ollama", transport=httpx.MockTransport(handler))],
+                        **options)
+
+
+def test_generate_post():
+    def handler(request):
+        return httpx.Response(200, json={"response": "# A Title\n\nSome content."})
+
+    with patch('main.ollama', ollama_transport(handler)):
+        response = client.post("/api/generate", json={"topic": "testing"})
+    assert response.json() == {"title": "A Title", "content": "Some content.", "topic": "testing"}
+
+
+def test_generate_post_stream_forwards_tokens():
+    chunks = [{"response": "A Title"}, {"response": "\n\nHello "}, {"response": "world", "done": True}]
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content="\n".join(json.dumps(c) for c in chunks).encode())
+
+    with patch('main.ollama', ollama_transport(handler)):
+        response = client.post("/api/generate/stream", json={"topic": "testing"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert events[0] == ("title", {"text": "A Title"})
+    assert [data["text"] for event, data in events if event == "content"] == ["Hello ", "world"]
+    assert events[-1] == ("done", {"title": "A Title", "content": "Hello world", "topic": "testing"})
+
+
+def test_failed_stream_is_an_error_and_not_cached():
+    endings = [
+        [{"response": "A Title"}, {"response": "\n\nSome"}, {"error": "model runner crashed"}],
+        [{"response": "A Title"}, {"response": "\n\nSome"}],
+    ]
+
+    def handler(request):
+        if not json.loads(request.content)["stream"]:
+            return httpx.Response(200, json={"response": "Full Title\n\nAll of it.", "done": True})
+        return httpx.Response(200, content="\n".join(json.dumps(c) for c in endings.pop(0)).encode())
+
+    with patch('main.ollama', ollama_transport(handler)):
+        crashed = client.post("/api/generate/stream", json={"topic": "testing"})
+        truncated = client.post("/api/generate/stream", json={"topic": "testing"})
+        after = client.post("/api/generate", json={"topic": "testing"})
+
+    assert "event: done" not in crashed.text and "model runner crashed" in crashed.text
+    assert "event: done" not in truncated.text and "event: error" in truncated.text
+    assert "X-Generation-Cache" not in after.headers
+    assert after.json()["title"] == "Full Title"
+
+
+def test_generate_reports_ollama_error():
+    def handler(request):
+        return httpx.Response(404, json={"error": "model 'llama3.2' not found"})
+
+    with patch('main.ollama', ollama_transport(handler)):
+        response = client.post("/api/generate", json={"topic": "testing"})
+        again = client.post("/api/generate", json={"topic": "testing"})
+    assert response.status_code == 502
+    assert "model 'llama3.2' not found" in response.json()["error"]
+    assert "X-Generation-Cache" not in again.headers
+
+
+def test_search_falls_back_to_keywords_without_ollama(mock_qdrant):
+    import main
+    mock_point = MagicMock()
+    mock_point.id = "test-id"
+    mock_point.payload = {"title": "Test Title", "content": "Test Content", "topic": "test"}
+    mock_point.score = 3.2
+    mock_qdrant.query_points.return_value = MagicMock(points=[mock_point])
+
+    def handler(request):
+        return httpx.Response(503)
+
+    with patch('main.ollama', ollama_transport(handler, retries=1, backoff=0)), \
+            patch('main.hybrid_enabled', True), patch('main.embedding_cache', main.EmbeddingCache(max_size=10)):
+        response = client.get("/api/posts/search/python?score_threshold=0.5")
+        assert response.headers["X-Search-Mode"] == "keyword"
+        assert response.json()[0]["title"] == "Test Title"
+        assert mock_qdrant.query_points.await_args.kwargs["using"] == main.SPARSE_VECTOR_NAME
+        # Degraded results are not cached
+        assert len(main.search_cache) == 0
+
+        with patch('main.hybrid_enabled', False):
+            response = client.get("/api/posts/search/python")
+        assert response.status_code == 503
+        assert "Model service unavailable" in response.json()["error"]
+
+
+def test_generate_post_cached_per_topic():
+    import main
+    prompts = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        prompts.append(body["prompt"])
+        assert body["keep_alive"] == main.GENERATE_KEEP_ALIVE
+        return httpx.Response(200, json={"response": f"Title {len(prompts)}\n\nContent."})
+
+    with patch('main.ollama', ollama_transport(handler)):
+        first = client.post("/api/generate", json={"topic": "Garden Tips"})
+        again = client.post("/api/generate", json={"topic": "  garden tips "})
+        streamed = client.post("/api/generate/stream", json={"topic": "garden tips"})
+        fresh = client.post("/api/generate", json={"topic": "garden tips", "fresh": True})
+
+    assert first.json() == {"title": "Title 1", "content": "Content.", "topic": "Garden Tips"}
+    assert again.json()["title"] == "Title 1" and again.headers["X-Generation-Cache"] == "hit"
+    assert streamed.headers["X-Generation-Cache"] == "hit" and '"title": "Title 1"' in streamed.text
+    assert fresh.json()["title"] == "Title 2"
+    assert len(prompts) == 2
+    assert prompts[0].startswith(main.GENERATION_PROMPT_PREFIX) and prompts[0].endswith("Garden Tips")
+
+
+async def test_concurrent_generations_for_a_topic_share_one_call():
+    import main
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"response": "Shared\n\nText."})
+
+    with patch('main.ollama', ollama_transport(handler)):
+        results = await asyncio.gather(*(
+            main.generate_post(main.TopicRequest(topic="popular"), MagicMock(headers={}))
+            for _ in range(5)
+        ))
+    assert len(calls) == 1
+    assert all(result["title"] == "Shared" for result in results)
+    assert main.generations_in_flight == {}
+
+
+async def test_warm_up_model_loads_every_host():
+    import main
+    from ollama_client import OllamaClient
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "x", "done": True})
+
+    hosts = [httpx.AsyncClient(base_url=f"http://ollama-{i}", transport=httpx.MockTransport(handler))
+             for i in range(2)]
+    with patch('main.ollama', OllamaClient(hosts)):
+        await main.warm_up_model()
+    assert len(bodies) == 2
+    assert bodies[0]["options"]["num_predict"] == 1
+    assert bodies[0]["prompt"] == main.GENERATION_PROMPT_PREFIX
+
+
+def test_generate_rejects_when_queue_full():
+    from generation import GenerationLimiter
+    with patch('main.generation_limiter', GenerationLimiter(concurrency=0, max_queue=0)):
+        assert client.post("/api/generate/stream", json={"topic": "t"}).status_code == 429
+        assert client.post("/api/generate", json={"topic": "t"}).status_code == 429
+
+
+def test_metrics_endpoint_reports_routes_and_stages(mock_qdrant):
+    mock_qdrant.retrieve.return_value = []
+    client.get("/api/posts/some-id")
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/posts/{post_id}",status="200"}' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert 'cache_lookups_total{cache="embedding",result="hit"}' in body
+
+
+def test_lifespan_opens_and_closes_clients():
+    import main
+    with patch('main.AsyncQdrantClient') as qdrant_cls:
+        qdrant_instance = AsyncMock()
+        qdrant_instance.collection_exists.return_value = True
+        qdrant_instance.scroll.return_value = ([MagicMock()], None)
+        qdrant_cls.return_value = qdrant_instance
+
+        with TestClient(app) as lifespan_client:
+            assert lifespan_client.get("/api/health").status_code == 200
+            assert main.qdrant.wrapped is qdrant_instance
+            assert main.ollama is not None
+            for _ in range(100):
+                if lifespan_client.get("/api/ready").status_code == 200:
+                    break
+                time.sleep(0.01)
+            assert lifespan_client.get("/api/ready").json() == {"status": "ready"}
+
+        qdrant_instance.create_collection.assert_not_awaited()
+        qdrant_instance.close.assert_awaited_once()
+        assert main.qdrant is None
+        assert main.ollama is None
+
+
+async def test_get_embedding_uses_cache():
+    import main
+    from embeddings import EmbeddingCache
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"embeddings": [[0.5] * 768]})
+
+    with patch('main.ollama', ollama_transport(handler)), \
+            patch('main.embedding_cache', EmbeddingCache(max_size=10)):
+        first = await main.get_embedding("same text")
+        second = await main.get_embedding("same text")
+
+        assert first == second == [0.5] * 768
+        assert len(requests) == 1
+        assert main.embedding_cache.stats()["hits"] == 1
+
+
+def test_embedding_cache_stats_endpoint():
+    response = client.get("/api/cache/embeddings")
+    assert response.status_code == 200
+    assert {"hits", "misses", "hit_ratio"} <= response.json().keys()
+
+
+async def test_get_embeddings_batches_cache_misses():
+    import main
+    from embeddings import EmbeddingCache
+    cache = EmbeddingCache(max_size=10)
+    cache.put(main.EMBED_MODEL, "cached", [1.0] * 768)
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"embeddings": [[0.5] * 768, [0.25] * 768]})
+
+    with patch('main.ollama', ollama_transport(handler)), patch('main.embedding_cache', cache):
+        embeddings = await main.get_embeddings(["a", "cached", "b"])
+
+    assert embeddings == [[0.5] * 768, [1.0] * 768, [0.25] * 768]
+    assert [request["input"] for request in requests] == [["a", "b"]]
+
+
+def test_bulk_import(mock_qdrant):
+    with patch('main.get_embeddings') as mock_embeddings:
+        mock_embeddings.side_effect = lambda texts: [[0.1] * 768 for _ in texts]
+        body = "\n".join([
+            '{"title": "A", "content": "Alpha", "topic": "test"}',
+            '{"title": "B", "content": "Beta", "topic": "test"}',
+            'not json',
+        ])
+        response = client.post("/api/posts/bulk?source=upload", content=body)
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["imported"] == 2
+    assert stats["failed"] == 1
+    assert stats["committed_lines"] == 3
+    mock_qdrant.upsert.assert_awaited()
+
+
+def test_bulk_import_failure_reports_where_to_resume(mock_qdrant):
+    upserts = []
+
+    async def upsert(*args, **kwargs):
+        upserts.append(1)
+        if len(upserts) == 2:
+            raise ConnectionError("qdrant went away")
+
+    mock_qdrant.upsert.side_effect = upsert
+    body = "\n".join(f'{{"title": "T{i}", "content": "C{i}"}}' for i in range(4))
+    with patch('main.get_embeddings', AsyncMock(side_effect=lambda texts: [[0.1] * 768 for _ in texts])), \
+            patch('main.IMPORT_BATCH_SIZE', 2), patch('main.IMPORT_UPLOAD_WORKERS', 1):
+        response = client.post("/api/posts/bulk?source=upload", content=body)
+
+    assert response.status_code == 503
+    stats = response.json()
+    assert stats["committed_lines"] == 2
+    assert "qdrant went away" in stats["error"]
+
+
+def test_ready_reports_starting_until_warm_up_completes():
+    with patch('main.ready', False), patch('main.startup_error', "ConnectError: refused"):
+        response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting", "error": "ConnectError: refused"}
+
+
+async def test_warm_up_retries_until_qdrant_is_reachable():
+    import main
+    attempts = []
+
+    async def flaky_ensure_collection():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("qdrant not up yet")
+
+    with patch('main.ensure_collection', flaky_ensure_collection), \
+            patch('main.is_collection_empty', AsyncMock(return_value=False)), \
+            patch('main.STARTUP_RETRY_DELAY', 0), patch('main.ready', False):
+        await main.warm_up()
+        assert main.ready is True
+    assert len(attempts) == 3
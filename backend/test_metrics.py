@@ -0,0 +1,61 @@
+"""Tests for the metrics registry, instrumentation and profiling middleware"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from metrics import (
+    STAGE_ERRORS,
+    STAGE_LATENCY,
+    InstrumentedClient,
+    ProfilingMiddleware,
+    Registry,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="a"} 3' in lines
+
+
+async def test_instrumented_client_times_calls_and_counts_errors():
+    class Client:
+        async def scroll(self):
+            return "ok"
+
+        async def delete(self):
+            raise RuntimeError("boom")
+
+        def sync_helper(self):
+            return "sync"
+
+    client = InstrumentedClient(Client(), "test")
+    assert await client.scroll() == "ok"
+    with pytest.raises(RuntimeError):
+        await client.delete()
+    assert client.sync_helper() == "sync"
+
+    assert sum(STAGE_LATENCY.values[("test.scroll",)][0]) == 1
+    assert STAGE_ERRORS.values[("test.delete",)] == 1
+
+
+def test_profiling_middleware_returns_report_only_on_request():
+    pytest.importorskip("pyinstrument")
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/work").json() == {"ok": True}
+    profiled = client.get("/work", headers={"X-Profile": "1"})
+    assert profiled.headers["content-type"].startswith("text/html")
@@ -0,0 +1,109 @@
+"""Tests for the resilient Ollama client"""
+import asyncio
+
+import httpx
+import pytest
+
+from ollama_client import CircuitBreaker, OllamaClient, OllamaUnavailable
+
+
+def host(name, handler):
+    return httpx.AsyncClient(base_url=f"http://{name}", transport=httpx.MockTransport(handler))
+
+
+async def test_retries_transient_failures():
+    statuses = [503, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json={"ok": True})
+
+    client = OllamaClient([host("a", handler)], retries=2, backoff=0)
+    response = await client.post("/api/embed", json={}, timeout=5)
+    assert response.json() == {"ok": True}
+    assert client.stats()["retries"] == 1
+
+
+async def test_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(404, json={"error": "model not found"})
+
+    client = OllamaClient([host("a", handler)], retries=2, backoff=0)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.post("/api/embed", json={}, timeout=5)
+    assert len(calls) == 1
+    assert client.hosts[0].breaker.state == "closed"
+
+
+async def test_circuit_opens_and_fails_fast():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        raise httpx.ConnectError("refused")
+
+    client = OllamaClient([host("a", handler)], retries=1, backoff=0, breaker_threshold=2)
+    with pytest.raises(OllamaUnavailable):
+        await client.post("/api/embed", json={}, timeout=5)
+    assert client.hosts[0].breaker.state == "open"
+    with pytest.raises(OllamaUnavailable, match="Circuit open"):
+        await client.post("/api/embed", json={}, timeout=5)
+    assert len(calls) == 2
+
+
+async def test_failing_host_is_routed_around():
+    def broken(request):
+        raise httpx.ConnectError("refused")
+
+    def healthy(request):
+        return httpx.Response(200, json={"host": "b"})
+
+    client = OllamaClient([host("a", broken), host("b", healthy)], retries=3, backoff=0,
+                          breaker_threshold=1)
+    for _ in range(3):
+        response = await client.post("/api/embed", json={}, timeout=5)
+        assert response.json() == {"host": "b"}
+    assert [h["state"] for h in client.stats()["hosts"]] == ["open", "closed"]
+
+
+def test_breaker_lets_one_probe_through_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=1, reset_after=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+async def test_hedged_request_uses_the_faster_host():
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"host": "slow"})
+
+    def fast(request):
+        return httpx.Response(200, json={"host": "fast"})
+
+    client = OllamaClient([host("a", slow), host("b", fast)], hedge_after=0.01)
+    response = await client.post("/api/embed", json={}, timeout=5, hedge=True)
+    assert response.json() == {"host": "fast"}
+    assert client.stats()["hedged"] == 1
+    assert all(h.in_flight == 0 for h in client.hosts)
+
+
+async def test_stream_skips_unreachable_host():
+    def broken(request):
+        raise httpx.ConnectError("refused")
+
+    def healthy(request):
+        return httpx.Response(200, content=b'{"response": "hi"}\n')
+
+    client = OllamaClient([host("a", broken), host("b", healthy)])
+    async with client.stream("/api/generate", json={}, timeout=5) as response:
+        lines = [line async for line in response.aiter_lines()]
+    assert lines == ['{"response": "hi"}']
+    assert client.hosts[0].breaker.failures == 1
@@ -0,0 +1,142 @@
+"""Tests for collection storage profiles and the alias-based migration"""
+import pytest
+from unittest.mock import patch
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import BinaryQuantization, ScalarQuantization
+
+import main
+import migrate_collection
+from migrate_collection import current_collection, migrate, sync_points
+from profiles import get_profile
+
+
+def test_default_profile_has_no_quantization():
+    profile = get_profile("default")
+    config = profile.collection_config(768)
+    assert "quantization_config" not in config
+    assert config["on_disk_payload"] is False
+    assert profile.search_params() is None
+
+
+def test_quantized_profiles():
+    int8 = get_profile("int8").collection_config(768)
+    assert isinstance(int8["quantization_config"], ScalarQuantization)
+    binary = get_profile("binary")
+    assert isinstance(binary.collection_config(768)["quantization_config"], BinaryQuantization)
+    assert binary.search_params().quantization.rescore is True
+
+    assert int8["vectors_config"].on_disk is True
+    assert int8["on_disk_payload"] is False
+
+    on_disk = get_profile("on_disk").collection_config(768)
+    assert on_disk["hnsw_config"].on_disk is True
+    assert on_disk["on_disk_payload"] is True
+
+
+def test_profile_overrides_and_memory_estimate():
+    profile = get_profile("int8", hnsw_m=32)
+    assert profile.hnsw_m == 32
+    assert profile.collection_config(768)["hnsw_config"].ef_construct == 100
+
+    memory = {name: get_profile(name).estimated_memory(10_000, 768)
+              for name in ("default", "int8", "binary", "on_disk")}
+    assert memory["on_disk"] == 0
+    assert memory["binary"] < memory["int8"] < memory["default"]
+
+    with pytest.raises(ValueError):
+        get_profile("fp16")
+
+
+@pytest.fixture
+async def local_qdrant():
+    client = AsyncQdrantClient(":memory:")
+    with patch('main.qdrant', client), patch('main.hybrid_enabled', True), \
+            patch('main.chunks_enabled', False):
+        yield client
+    await client.close()
+
+
+def points(count, topic="test"):
+    return [
+        main.make_point(f"00000000-0000-0000-0000-{i:012d}",
+                        {"title": f"Post {i}", "content": "Content", "topic": topic},
+                        [[1.0, float(i)] + [0.0] * (main.VECTOR_SIZE - 2)])
+        for i in range(count)
+    ]
+
+
+async def test_migrate_pre_alias_collection(local_qdrant):
+    await local_qdrant.create_collection(
+        main.COLLECTION_NAME, **get_profile("default").collection_config(main.VECTOR_SIZE),
+        sparse_vectors_config={main.SPARSE_VECTOR_NAME: main.SparseVectorParams(modifier=main.Modifier.IDF)},
+    )
+    await local_qdrant.upsert(main.COLLECTION_NAME, points=points(5))
+
+    target = await migrate(get_profile("int8"), batch_size=2)
+
+    assert await current_collection() == target
+    assert (await local_qdrant.count(main.COLLECTION_NAME)).count == 5
+    hits = await local_qdrant.query_points(
+        main.COLLECTION_NAME, query=main.sparse.query_vector("Post"), using=main.SPARSE_VECTOR_NAME)
+    assert len(hits.points) == 5
+
+
+async def test_migrate_swaps_alias_and_drops_old(local_qdrant):
+    with patch('main.collection_profile', get_profile("default")):
+        await main.ensure_collection()
+    old = await current_collection()
+    await local_qdrant.upsert(main.COLLECTION_NAME, points=points(3))
+
+    target = await migrate(get_profile("binary"), drop_old=True)
+
+    assert target != old and await current_collection() == target
+    assert not await local_qdrant.collection_exists(old)
+    assert (await local_qdrant.count(main.COLLECTION_NAME)).count == 3
+
+
+async def test_sync_points_copies_changes_and_deletions(local_qdrant):
+    for name in ("source", "target"):
+        await local_qdrant.create_collection(name, **get_profile("default").collection_config(main.VECTOR_SIZE))
+    with patch('main.hybrid_enabled', False):
+        await local_qdrant.upsert("source", points=points(4))
+        assert await sync_points("source", "target") == 4
+        assert await sync_points("source", "target") == 0
+
+        await local_qdrant.upsert("source", points=points(1, topic="changed"))
+        await local_qdrant.delete("source", points_selector=[points(4)[3].id])
+        assert await sync_points("source", "target") == 2
+
+    assert (await local_qdrant.count("target")).count == 3
+    first = await local_qdrant.retrieve("target", ids=[points(1)[0].id])
+    assert first[0].payload["topic"] == "changed"
+
+
+async def test_migrate_catches_up_until_writes_settle(local_qdrant):
+    with patch('main.collection_profile', get_profile("default")):
+        await main.ensure_collection()
+    await local_qdrant.upsert(main.COLLECTION_NAME, points=points(3))
+    first, second = points(2)[0].id, points(2)[1].id
+    passes = []
+
+    async def sync_while_writing(source, target, batch_size):
+        changed = await sync_points(source, target, batch_size)
+        passes.append(changed)
+        if len(passes) <= 2:
+            # An edit (and first a delete) arrive while each of the first two passes runs
+            await local_qdrant.upsert(main.COLLECTION_NAME, points=points(1, topic=f"edit {len(passes)}"))
+            await local_qdrant.delete(main.COLLECTION_NAME, points_selector=[second])
+        return changed
+
+    with patch.object(migrate_collection, 'sync_points', sync_while_writing):
+        await migrate(get_profile("int8"))
+        # The copy and two catch-up passes each saw new writes; the third found none
+        assert passes == [3, 2, 1, 0]
+        stored = {point.id: point.payload["topic"]
+                  for point in (await local_qdrant.scroll(main.COLLECTION_NAME))[0]}
+        assert second not in stored and stored[first] == "edit 2"
+
+        passes.clear()
+        collections = len((await local_qdrant.get_collections()).collections)
+        with pytest.raises(RuntimeError, match="catch-up passes"):
+            await migrate(get_profile("binary"), max_passes=1)
+        assert len((await local_qdrant.get_collections()).collections) == collections
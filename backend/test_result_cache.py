@@ -0,0 +1,31 @@
+"""Tests for the TTL/LRU result cache"""
+from unittest.mock import patch
+from result_cache import ResultCache
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(max_size=10, ttl=5)
+    with patch("result_cache.time.monotonic", return_value=100.0):
+        cache.put("a", 1)
+    with patch("result_cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == 1
+    with patch("result_cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_cache():
+    cache = ResultCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,81 @@
+"""Tests for the cross-process locks, counter and job store"""
+import multiprocessing
+import os
+import time
+
+from shared import FileLock, JobStore, SharedCounter, SharedSlots
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    first, second = FileLock(str(tmp_path / "lock")), FileLock(str(tmp_path / "lock"))
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_file_lock_without_path_is_a_no_op():
+    lock = FileLock(None)
+    assert lock.try_acquire() and lock.try_acquire()
+    lock.release()
+
+
+def test_shared_slots_are_taken_once(tmp_path):
+    paths = [str(tmp_path / f"slot-{i}.lock") for i in range(2)]
+    mine, other = SharedSlots(paths), SharedSlots(paths)
+    first = mine.try_acquire()
+    second = other.try_acquire()
+    assert first is not None and second is not None and first.path != second.path
+    assert mine.try_acquire() is None
+    second.release()
+    assert mine.try_acquire().path == second.path
+
+
+def increment_many(path, times):
+    counter = SharedCounter(path)
+    for _ in range(times):
+        counter.increment()
+
+
+def test_shared_counter_across_processes(tmp_path):
+    path = str(tmp_path / "generation")
+    reader = SharedCounter(path)
+    assert reader.value == 0
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=increment_many, args=(path, 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert reader.value == 800
+    reader.close()
+
+
+def test_local_counter():
+    counter = SharedCounter()
+    assert counter.increment() == 1 and counter.value == 1
+
+
+def test_job_store_is_shared_through_its_directory(tmp_path):
+    writer, reader = JobStore(str(tmp_path / "jobs")), JobStore(str(tmp_path / "jobs"))
+    writer.put("abc123", {"id": "abc123", "status": "pending"})
+    writer.put("abc123", {"id": "abc123", "status": "completed"})
+    assert reader.get("abc123") == {"id": "abc123", "status": "completed"}
+    assert reader.get("missing") is None and reader.get("../abc123") is None
+
+
+def test_job_store_drops_old_jobs(tmp_path):
+    store = JobStore(str(tmp_path), ttl=60)
+    store.put("old", {"status": "completed"})
+    stale = time.time() - 120
+    os.utime(tmp_path / "old.json", (stale, stale))
+    assert store.get("old") is None
+    store.put("new", {"status": "pending"})
+    assert not (tmp_path / "old.json").exists()
+
+    local = JobStore(ttl=60)
+    local.put("job", {"status": "pending"})
+    assert local.get("job") == {"status": "pending"}
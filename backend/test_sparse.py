@@ -0,0 +1,20 @@
+"""Tests for the BM25-style sparse encoder"""
+from sparse import document_vector, query_vector, token_index, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Future of AI, in Healthcare!") == ["future", "ai", "healthcare"]
+
+
+def test_document_vector_saturates_term_frequency():
+    vector = document_vector("python python python django")
+    weights = dict(zip(vector.indices, vector.values))
+    python, django = weights[token_index("python")], weights[token_index("django")]
+    assert python > django
+    assert python < 3 * django
+
+
+def test_query_vector_has_unit_weights():
+    vector = query_vector("machine learning machine")
+    assert len(vector.indices) == 2
+    assert vector.values == [1.0, 1.0]
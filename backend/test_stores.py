@@ -0,0 +1,356 @@
+"""Storage tests run against every vector store backend.
+
+`memory` and `local` (on disk) use Qdrant's embedded engine and always run.
+`qdrant` needs a server and runs when QDRANT_TEST_HOST is set, e.g.
+
+    QDRANT_TEST_HOST=localhost uv run pytest test_stores.py
+"""
+import asyncio
+import hashlib
+import math
+import os
+import threading
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Response
+
+import main
+from result_cache import ResultCache
+from write_queue import WriteBehindQueue, WriteJournal
+
+
+def bag_of_words(text: str) -> list:
+    """Deterministic embedding: texts sharing words get similar vectors"""
+    vector = [0.0] * main.VECTOR_SIZE
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % main.VECTOR_SIZE] += 1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+async def fake_embeddings(texts):
+    return [bag_of_words(text) for text in texts]
+
+
+def client_for(kind: str, tmp_path):
+    if kind == "memory":
+        return main.create_vector_store("local", None)
+    if kind == "local":
+        return main.create_vector_store("local", str(tmp_path / "qdrant"))
+    host = os.getenv("QDRANT_TEST_HOST")
+    if not host:
+        pytest.skip("set QDRANT_TEST_HOST to run against a Qdrant server")
+    with patch('main.QDRANT_HOST', host):
+        return main.create_vector_store("qdrant")
+
+
+async def drop_collection(client, name: str):
+    for alias in (await client.get_aliases()).aliases:
+        if alias.alias_name == name:
+            await client.delete_collection(alias.collection_name)
+
+
+@pytest.fixture(params=["memory", "local", "qdrant"])
+async def store(request, tmp_path):
+    """A fresh, empty blog collection on one backend, installed as main.qdrant"""
+    client = client_for(request.param, tmp_path)
+    # A unique name keeps runs against a shared server apart
+    name = f"blogposts_test_{uuid.uuid4().hex[:8]}"
+    with patch('main.qdrant', client), patch('main.COLLECTION_NAME', name), \
+            patch('main.hybrid_enabled', False), patch('main.chunks_enabled', False), \
+            patch('main.search_cache', ResultCache()), patch('main.RELATED_POSTS', 0), \
+            patch('main.get_embeddings', AsyncMock(side_effect=fake_embeddings)):
+        await main.ensure_collection()
+        try:
+            yield client
+        finally:
+            await main.drain_related()
+            if request.param == "qdrant":
+                await drop_collection(client, name)
+    await client.close()
+
+
+def post(title, content, topic="t"):
+    return main.BlogPost(title=title, content=content, topic=topic)
+
+
+async def test_local_store_runs_off_the_event_loop():
+    client = main.create_vector_store("local", None)
+    threads = []
+    get_collections = client.wrapped.get_collections
+
+    def recorded():
+        threads.append(threading.current_thread())
+        return get_collections()
+
+    client.wrapped.get_collections = recorded
+    assert (await client.get_collections()).collections == []
+    await client.close()
+    assert threads and threads[0] is not threading.current_thread()
+
+
+async def test_create_read_list_and_delete(store):
+    ids = [(await main.create_post(post(f"Post {i}", f"content {i}")))["id"] for i in range(3)]
+
+    fetched = await main.get_post(ids[0])
+    assert (fetched.title, fetched.content, fetched.topic) == ("Post 0", "content 0", "t")
+
+    response = Response()
+    page = await main.get_all_posts(response, limit=2, cursor=None, fields="title", snippet=None)
+    assert len(page) == 2 and all(p.content is None for p in page)
+    rest = await main.get_all_posts(Response(), limit=2, cursor=response.headers["X-Next-Cursor"],
+                                    fields=None, snippet=None)
+    assert {str(p.id) for p in page + rest} == set(ids)
+
+    await main.delete_post(ids[0])
+    assert await main.get_post(ids[0]) == {"error": "Post not found"}
+
+
+async def test_search_modes_and_topic_filter(store):
+    await main.create_post(post("Python basics", "python functions and classes", "programming"))
+    await main.create_post(post("Python web", "python web frameworks", "web"))
+    await main.create_post(post("Gardening", "tomatoes and compost", "lifestyle"))
+
+    async def search(query, mode, topic=None):
+        hits = await main.search_posts(query, Response(), topic=topic, limit=10, offset=0,
+                                       score_threshold=None, mode=mode, snippet=None)
+        return [hit.title for hit in hits]
+
+    assert (await search("python classes", "dense"))[0] == "Python basics"
+    assert set(await search("python", "keyword")) == {"Python basics", "Python web"}
+    assert (await search("compost", "hybrid"))[0] == "Gardening"
+    assert await search("python", "hybrid", topic="web") == ["Python web"]
+
+
+async def test_update_reembeds_only_changed_text(store):
+    post_id = (await main.create_post(post("Title", "original text")))["id"]
+
+    unchanged = await main.patch_post(post_id, main.BlogPostPatch(topic="moved"))
+    changed = await main.patch_post(post_id, main.BlogPostPatch(content="rewritten text"))
+
+    assert (unchanged["reembedded"], changed["reembedded"]) == (False, True)
+    stored = await main.get_post(post_id)
+    assert (stored.topic, stored.content) == ("moved", "rewritten text")
+
+
+async def test_bulk_delete_by_topic(store):
+    for i in range(4):
+        await main.create_post(post(f"Post {i}", "text", topic="old" if i % 2 else "keep"))
+
+    with patch('main.BULK_DELETE_POLL_INTERVAL', 0.01):
+        job = await main.bulk_delete(main.BulkDeleteRequest(topic="old"))
+        await asyncio.gather(*main.background_tasks)
+
+    assert job["matched"] == 2 and job["status"] == "completed"
+    remaining = await main.get_all_posts(Response(), limit=10, cursor=None, fields=None, snippet=None)
+    assert {p.topic for p in remaining} == {"keep"}
+
+
+async def test_long_post_found_by_its_last_chunk(store):
+    def embeddings(texts):
+        return [[1.0, 0.0] + [0.0] * 766 if "quantum" in text else [0.0, 1.0] + [0.0] * 766
+                for text in texts]
+
+    filler = " ".join(["filler"] * 300)
+    with patch('main.CHUNK_WORDS', 100), \
+            patch('main.get_embeddings', AsyncMock(side_effect=embeddings)) as embed:
+        await main.upsert_points(await main.build_points([
+            ("00000000-0000-0000-0000-000000000001",
+             {"title": "Long", "content": f"{filler} quantum computing", "topic": "t"}),
+            ("00000000-0000-0000-0000-000000000002",
+             {"title": "Short", "content": "Something else", "topic": "t"}),
+        ]))
+        results = await main.run_search("quantum", None, 10, 0, None, "dense")
+
+    # Every chunk of both posts went out in one batch: 5 for the long post, 1 for the short
+    assert len(embed.await_args_list[0].args[0]) == 6
+    assert [post.title for post in results] == ["Long", "Short"]
+    assert results[0].score > 0.99
+
+
+async def test_write_behind_create_and_patch(store, tmp_path):
+    queue = WriteBehindQueue(WriteJournal(str(tmp_path / "writes.db")), main.save_posts, workers=1)
+    with patch('main.write_queue', queue):
+        created = await main.create_post(post("Queued", "Body"))
+        assert created["status"] == "pending"
+        post_id = created["id"]
+        assert (await main.write_status(post_id))["status"] == "pending"
+        assert await main.get_post(post_id) == {"error": "Post not found"}
+
+        # A patch before the create is applied builds on the queued version
+        await main.patch_post(post_id, main.BlogPostPatch(topic="moved"))
+        queue.start()
+        await asyncio.wait_for(queue.drain(), 5)
+        await queue.stop()
+
+        stored = await main.get_post(post_id)
+        assert (stored.title, stored.topic) == ("Queued", "moved")
+        assert (await main.write_status(post_id))["status"] == "done"
+        assert (await main.write_queue_stats())["pending"] == 0
+
+
+def unit_vector(angle):
+    return [math.cos(angle), math.sin(angle)] + [0.0] * 766
+
+
+async def test_similar_posts_and_related_payload(store):
+    angles = {"alpha": 0.0, "beta": 0.1, "gamma": 1.5, "delta": 0.05}
+    ids = {name: f"00000000-0000-0000-0000-00000000000{i}" for i, name in enumerate(angles)}
+
+    def embeddings(texts):
+        return [unit_vector(angles[text.split()[0]]) for text in texts]
+
+    def named(name, topic="t"):
+        return ids[name], {"title": name, "content": "text", "topic": topic}
+
+    with patch('main.RELATED_POSTS', 2), \
+            patch('main.get_embeddings', AsyncMock(side_effect=embeddings)) as embed:
+        await main.upsert_points(await main.build_points(
+            [named("alpha"), named("beta"), named("gamma", topic="other")]))
+        await main.drain_related()
+        embed.reset_mock()
+
+        similar = await main.similar_posts(ids["alpha"], limit=5, topic=None, snippet=None)
+        assert [p.title for p in similar] == ["beta", "gamma"]
+        other = await main.similar_posts(ids["alpha"], limit=5, topic="other", snippet=None)
+        assert [p.title for p in other] == ["gamma"]
+        batch = await main.similar_posts_batch(
+            main.SimilarRequest(ids=[ids["gamma"], "missing"], limit=1), snippet=None)
+        assert [p.title for p in batch[ids["gamma"]]] == ["beta"] and batch["missing"] == []
+        embed.assert_not_awaited()
+
+        alpha = await main.get_post(ids["alpha"])
+        assert [entry.title for entry in alpha.related] == ["beta", "gamma"]
+
+        # A new post close to alpha pushes gamma out of alpha's list
+        await main.upsert_points(await main.build_points([named("delta")]))
+        await main.drain_related()
+        alpha = await main.get_post(ids["alpha"])
+        assert [entry.title for entry in alpha.related] == ["delta", "beta"]
+
+        await main.delete_post(ids["delta"])
+        await main.drain_related()
+        alpha = await main.get_post(ids["alpha"])
+        assert [entry.title for entry in alpha.related] == ["beta", "gamma"]
+        assert await main.similar_posts(ids["delta"], limit=5, topic=None, snippet=None) == \
+            {"error": "Post not found"}
+
+
+async def test_long_post_scores_on_the_cosine_scale(store):
+    angles = {"alpha": 0.1, "beta": 0.0, "long": 0.98}
+    ids = {name: f"00000000-0000-0000-0000-00000000000{i}" for i, name in enumerate(angles)}
+
+    def embeddings(texts):
+        return [unit_vector(angles[text.split()[0]]) for text in texts]
+
+    def named(name, content="text"):
+        return ids[name], {"title": name, "content": content, "topic": "t"}
+
+    with patch('main.RELATED_POSTS', 1), patch('main.CHUNK_WORDS', 100), \
+            patch('main.get_embeddings', AsyncMock(side_effect=embeddings)):
+        await main.upsert_points(await main.build_points([named("alpha"), named("beta")]))
+        await main.drain_related()
+        # Every chunk of the long post is about as close to beta as a single vector would be
+        await main.upsert_points(await main.build_points([named("long", " ".join(["word"] * 300))]))
+        await main.drain_related()
+
+        similar = await main.similar_posts(ids["long"], limit=5, topic=None, snippet=None)
+        assert [p.title for p in similar] == ["alpha", "beta"]
+        assert [p.score for p in similar] == pytest.approx([math.cos(0.88), math.cos(0.98)], abs=1e-3)
+        beta = await main.get_post(ids["beta"])
+        assert [entry.title for entry in beta.related] == ["alpha"]
+
+        # Counts come from the payload, or from the vectors for posts stored without one
+        counts = await main.chunk_counts([ids["long"], ids["beta"]])
+        assert counts[ids["long"]] > 1 and counts[ids["beta"]] == 1
+        await store.delete_payload(main.COLLECTION_NAME, keys=["chunk_count"], points=[ids["long"]])
+        assert await main.chunk_counts([ids["long"], ids["beta"]]) == counts
+
+
+async def test_related_overflow_and_failures_are_not_lost(store):
+    angles = {"alpha": 0.0, "beta": 0.1, "gamma": 1.5}
+    ids = {name: f"00000000-0000-0000-0000-00000000000{i}" for i, name in enumerate(angles)}
+
+    def embeddings(texts):
+        return [unit_vector(angles[text.split()[0]]) for text in texts]
+
+    refresh_related = main.refresh_related
+    failures = []
+
+    async def flaky_refresh(post_ids):
+        if not failures:
+            failures.append(post_ids)
+            raise RuntimeError("qdrant went away")
+        await refresh_related(post_ids)
+
+    # Three posts overflow a queue of two, so one pass over every post replaces it
+    with patch('main.RELATED_POSTS', 1), patch('main.RELATED_QUEUE_SIZE', 2), \
+            patch('main.RELATED_RETRY_DELAY', 0), patch('main.refresh_related', flaky_refresh), \
+            patch('main.get_embeddings', AsyncMock(side_effect=embeddings)):
+        await main.upsert_points(await main.build_points(
+            [(ids[name], {"title": name, "content": "text", "topic": "t"}) for name in angles]))
+        assert not main.related_pending and len(main.related_stale_filters) == 1
+        await main.drain_related()
+
+        assert len(failures) == 1
+        related = {name: [entry.title for entry in (await main.get_post(ids[name])).related] for name in angles}
+    assert related == {"alpha": ["beta"], "beta": ["alpha"], "gamma": ["beta"]}
+
+
+async def test_bulk_delete_clears_related_after_topic_change(store):
+    angles = {"alpha": 0.0, "beta": 0.1, "gamma": 1.5}
+    ids = {name: f"00000000-0000-0000-0000-00000000000{i}" for i, name in enumerate(angles)}
+
+    def embeddings(texts):
+        return [unit_vector(angles[text.split()[0]]) for text in texts]
+
+    with patch('main.RELATED_POSTS', 2), patch('main.BULK_DELETE_POLL_INTERVAL', 0.01), \
+            patch('main.get_embeddings', AsyncMock(side_effect=embeddings)):
+        await main.upsert_points(await main.build_points(
+            [(ids[name], {"title": name, "content": "text", "topic": "t"}) for name in angles]))
+        await main.drain_related()
+
+        # A topic-only edit keeps the vector; neighbours' copies of the topic are refreshed
+        await main.patch_post(ids["beta"], main.BlogPostPatch(topic="spam"))
+        await main.drain_related()
+        alpha = await main.get_post(ids["alpha"])
+        assert [(entry.title, entry.topic) for entry in alpha.related] == [("beta", "spam"), ("gamma", "t")]
+
+        await main.bulk_delete(main.BulkDeleteRequest(topic="spam"))
+        await asyncio.gather(*main.background_tasks)
+        await main.drain_related()
+        alpha = await main.get_post(ids["alpha"])
+        assert [entry.title for entry in alpha.related] == ["gamma"]
+
+
+async def test_write_behind_delete_during_embedding(store, tmp_path):
+    embedding, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_embeddings(texts):
+        embedding.set()
+        await release.wait()
+        return await fake_embeddings(texts)
+
+    queue = WriteBehindQueue(WriteJournal(str(tmp_path / "writes.db")), main.save_posts, workers=1)
+    with patch('main.write_queue', queue), patch('main.BULK_DELETE_POLL_INTERVAL', 0.01), \
+            patch('main.get_embeddings', AsyncMock(side_effect=slow_embeddings)):
+        post_id = (await main.create_post(post("Doomed", "Body")))["id"]
+        queue.start()
+        await asyncio.wait_for(embedding.wait(), 5)
+        # The worker is embedding the create; the delete must still win
+        await main.delete_post(post_id)
+        # A queued create matching a bulk delete by topic never lands either
+        queued_id = (await main.create_post(post("Spam", "Body", topic="spam")))["id"]
+        await main.bulk_delete(main.BulkDeleteRequest(topic="spam"))
+        release.set()
+        await asyncio.wait_for(queue.drain(), 5)
+        await asyncio.gather(*main.background_tasks)
+        await queue.stop()
+
+        assert await main.get_post(post_id) == {"error": "Post not found"}
+        status = await main.write_status(post_id)
+        assert (status["operation"], status["status"]) == ("delete", "done")
+        assert await main.get_post(queued_id) == {"error": "Post not found"}
+        assert (await main.write_status(queued_id))["status"] == "cancelled"
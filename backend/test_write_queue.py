@@ -0,0 +1,109 @@
+"""Tests for the write-behind journal and queue"""
+import asyncio
+
+from write_queue import WriteBehindQueue, WriteJournal
+
+
+def journal(tmp_path, **options):
+    return WriteJournal(str(tmp_path / "writes.db"), **options)
+
+
+async def test_batches_writes_and_keeps_the_latest_per_post(tmp_path):
+    applied = []
+
+    async def apply(posts):
+        applied.append(posts)
+
+    queue = WriteBehindQueue(journal(tmp_path), apply, batch_size=10, workers=1)
+    await queue.submit("a", {"title": "first"})
+    await queue.submit("b", {"title": "other"})
+    await queue.submit("a", {"title": "second"})
+    queue.start()
+    await asyncio.wait_for(queue.drain(), 5)
+    await queue.stop()
+
+    assert applied == [[("a", {"title": "second"}), ("b", {"title": "other"})]]
+    assert (await queue.latest("a"))["status"] == "done"
+    assert (await queue.stats())["done"] == 3
+
+
+async def test_failed_batches_are_retried_then_given_up(tmp_path):
+    calls = []
+
+    async def apply(posts):
+        calls.append(posts)
+        if len(calls) < 2:
+            raise RuntimeError("ollama down")
+
+    queue = WriteBehindQueue(journal(tmp_path), apply, workers=1, retry_delay=0, poll_interval=0.01)
+    await queue.submit("a", {"title": "t"})
+    queue.start()
+    await asyncio.wait_for(queue.drain(), 5)
+    assert len(calls) == 2
+    assert (await queue.latest("a"))["attempts"] == 1
+
+    async def broken(posts):
+        raise RuntimeError("still down")
+
+    queue.apply = broken
+    queue.max_attempts = 2
+    await queue.submit("b", {"title": "t"})
+    await asyncio.wait_for(queue.drain(), 5)
+    await queue.stop()
+    status = await queue.latest("b")
+    assert status["status"] == "failed" and "still down" in status["error"]
+
+
+def test_post_waits_for_its_earlier_write(tmp_path):
+    writes = journal(tmp_path)
+    writes.add("a", {"v": 1})
+    writes.add("b", {"v": 1})
+    writes.add("a", {"v": 2})
+    first = writes.claim("worker-1", 1)
+    assert [row["post_id"] for row in first] == ["a"]
+    # Another worker must not apply a's second write while the first is leased
+    assert [row["post_id"] for row in writes.claim("worker-2", 10)] == ["b"]
+
+    writes.retry([first[0]["seq"]], "error", delay=60, max_attempts=5)
+    # a's first write now waits for its retry, so its second write waits too
+    assert writes.claim("worker-2", 10) == []
+
+
+def test_journal_survives_restart(tmp_path):
+    writes = journal(tmp_path)
+    writes.add("a", {"title": "t"})
+    assert len(writes.claim("dead-worker", 10)) == 1
+    writes.close()
+
+    reopened = journal(tmp_path)
+    assert reopened.claim("new-worker", 10) == []
+    reopened.release()
+    assert [row["post_id"] for row in reopened.claim("new-worker", 10)] == ["a"]
+
+    expired = journal(tmp_path, claim_timeout=0)
+    assert [row["post_id"] for row in expired.claim("third-worker", 10)] == ["a"]
+
+
+def test_delete_cancels_unstarted_writes(tmp_path):
+    writes = journal(tmp_path)
+    writes.add("a", {"title": "t"})
+    assert writes.delete(["a"]) == 0
+    assert writes.claim("worker", 10) == []
+    assert writes.latest("a")["status"] == "cancelled"
+
+
+def test_delete_waits_behind_a_write_in_progress(tmp_path):
+    writes = journal(tmp_path)
+    writes.add("a", {"title": "t", "topic": "spam"})
+    writes.add("b", {"title": "t", "topic": "spam"})
+    in_progress = writes.claim("worker-1", 1)
+    assert writes.pending_ids("spam") == ["a", "b"]
+
+    # a's write may land any moment, so its delete is queued behind it; b's never started
+    assert writes.delete(["a", "b"]) == 1
+    assert writes.latest("b")["status"] == "cancelled"
+    assert writes.claim("worker-2", 10) == []
+    writes.complete([in_progress[0]["seq"]])
+    [delete] = writes.claim("worker-2", 10)
+    assert delete["post_id"] == "a" and delete["payload"] == "null"
+    assert writes.latest("a")["operation"] == "delete"
@@ -0,0 +1,316 @@
+"""Write-behind queue: posts are journaled, acknowledged, then embedded and upserted in batches.
+
+The journal is a SQLite table, so an acknowledged write survives a restart.
+Workers claim pending entries in batches, hand the latest payload per post to
+`apply`, and mark them done, or schedule a retry with exponential backoff on
+failure. A claim is a lease: entries claimed by a process that died become
+claimable again after `claim_timeout` seconds, and several processes can
+share one journal file.
+
+Writes to the same post are applied in order: a post with an entry claimed
+by some worker, or an earlier entry waiting for a retry, is skipped by other
+claims until that entry is finished.
+
+Deletes go through the journal too, as entries with a null payload. Deleting
+a post cancels its entries no worker has started; if a worker is already
+applying one, a delete entry is queued behind it, so the post does not come
+back when that write lands.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import suppress
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+Post = Tuple[str, Optional[dict]]  # (point id, payload); a None payload deletes the post
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS writes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS writes_status ON writes (status, seq);
+CREATE INDEX IF NOT EXISTS writes_post ON writes (post_id, seq);
+"""
+
+
+class WriteJournal:
+    """Durable record of queued writes; every method is a short blocking SQLite call"""
+
+    def __init__(self, path: str, claim_timeout: float = 300.0):
+        self.claim_timeout = claim_timeout
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        # WAL with NORMAL sync survives a process crash, only an OS crash can lose the last commits
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def add(self, post_id: str, payload: Optional[dict]) -> int:
+        now = time.time()
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO writes (post_id, payload, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (post_id, json.dumps(payload), now, now),
+            )
+        return cursor.lastrowid
+
+    def claim(self, owner: str, limit: int) -> List[sqlite3.Row]:
+        """Lease up to `limit` due entries, oldest first, skipping posts leased by someone else"""
+        now = time.time()
+        stale = now - self.claim_timeout
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                # Skip posts with another entry leased, or an earlier one waiting for its retry
+                rows = self.db.execute(
+                    """
+                    SELECT seq, post_id, payload FROM writes AS w
+                    WHERE status = 'pending' AND not_before <= :now
+                      AND (claimed_by IS NULL OR claimed_at < :stale)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM writes AS other
+                          WHERE other.post_id = w.post_id AND other.status = 'pending'
+                            AND other.seq != w.seq
+                            AND ((other.claimed_by IS NOT NULL AND other.claimed_at >= :stale)
+                                 OR (other.seq < w.seq AND other.not_before > :now))
+                      )
+                    ORDER BY seq LIMIT :limit
+                    """,
+                    {"now": now, "stale": stale, "limit": limit},
+                ).fetchall()
+                self.db.executemany(
+                    "UPDATE writes SET claimed_by = ?, claimed_at = ? WHERE seq = ?",
+                    [(owner, now, row["seq"]) for row in rows],
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def complete(self, seqs: List[int]):
+        with self.lock:
+            self.db.executemany(
+                "UPDATE writes SET status = 'done', error = NULL, claimed_by = NULL, updated_at = ? WHERE seq = ?",
+                [(time.time(), seq) for seq in seqs],
+            )
+
+    def retry(self, seqs: List[int], error: str, delay: float, max_attempts: int):
+        """Release failed entries to be retried after `delay` * 2**attempts, or give up on them"""
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                """
+                UPDATE writes SET
+                    attempts = attempts + 1,
+                    error = ?,
+                    claimed_by = NULL,
+                    not_before = ? + ? * (1 << attempts),
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END,
+                    updated_at = ?
+                WHERE seq = ?
+                """,
+                [(error, now, delay, max_attempts, now, seq) for seq in seqs],
+            )
+
+    def release(self, owner: Optional[str] = None):
+        """Drop the leases of `owner`, or of everyone, so the entries are claimed again right away"""
+        with self.lock:
+            if owner is None:
+                self.db.execute("UPDATE writes SET claimed_by = NULL WHERE status = 'pending'")
+            else:
+                self.db.execute("UPDATE writes SET claimed_by = NULL WHERE claimed_by = ?", (owner,))
+
+    def delete(self, post_ids: List[str]) -> int:
+        """Cancel the posts' unstarted writes and queue a delete behind any write in progress.
+
+        Returns the number of delete entries queued.
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.executemany(
+                    "UPDATE writes SET status = 'cancelled', updated_at = ? "
+                    "WHERE post_id = ? AND status = 'pending' AND claimed_by IS NULL",
+                    [(now, post_id) for post_id in post_ids],
+                )
+                # Whatever is still pending is claimed by a worker and may land at any moment
+                in_progress = [
+                    post_id for post_id in post_ids
+                    if self.db.execute(
+                        "SELECT 1 FROM writes WHERE post_id = ? AND status = 'pending' LIMIT 1", (post_id,)
+                    ).fetchone()
+                ]
+                self.db.executemany(
+                    "INSERT INTO writes (post_id, payload, created_at, updated_at) VALUES (?, 'null', ?, ?)",
+                    [(post_id, now, now) for post_id in in_progress],
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return len(in_progress)
+
+    def pending_ids(self, topic: str) -> List[str]:
+        """Posts with a pending write that sets `topic`"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT DISTINCT post_id FROM writes "
+                "WHERE status = 'pending' AND json_extract(payload, '$.topic') = ?",
+                (topic,),
+            ).fetchall()
+        return [row["post_id"] for row in rows]
+
+    def latest(self, post_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT * FROM writes WHERE post_id = ? ORDER BY seq DESC LIMIT 1", (post_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row["payload"])
+        return {
+            "id": row["post_id"],
+            "operation": "write" if payload is not None else "delete",
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "error": row["error"],
+            "queued_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "payload": payload,
+        }
+
+    def stats(self) -> dict:
+        with self.lock:
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM writes GROUP BY status").fetchall())
+            oldest = self.db.execute("SELECT MIN(created_at) FROM writes WHERE status = 'pending'").fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "cancelled": counts.get("cancelled", 0),
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest else None,
+        }
+
+    def prune(self, retention: float):
+        """Forget finished entries older than `retention` seconds; failed ones are kept"""
+        with self.lock:
+            self.db.execute(
+                "DELETE FROM writes WHERE status IN ('done', 'cancelled') AND updated_at < ?",
+                (time.time() - retention,),
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class WriteBehindQueue:
+    """Worker tasks draining a WriteJournal through `apply(posts)`.
+
+    `posts` holds the latest payload per post, None for a deleted post.
+    """
+
+    def __init__(
+        self,
+        journal: WriteJournal,
+        apply: Callable[[List[Post]], Awaitable],
+        batch_size: int = 64,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        retry_delay: float = 1.0,
+        max_attempts: int = 8,
+        retention: float = 3600.0,
+    ):
+        self.journal = journal
+        self.apply = apply
+        self.batch_size = batch_size
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.wake = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+
+    async def submit(self, post_id: str, payload: dict) -> int:
+        """Journal a write; once this returns it will be applied, even across a restart"""
+        seq = await asyncio.to_thread(self.journal.add, post_id, payload)
+        self.wake.set()
+        return seq
+
+    async def delete(self, post_ids: List[str]) -> int:
+        """Journal deletes; call before deleting the posts from the store"""
+        queued = await asyncio.to_thread(self.journal.delete, post_ids)
+        if queued:
+            self.wake.set()
+        return queued
+
+    async def pending_ids(self, topic: str) -> List[str]:
+        return await asyncio.to_thread(self.journal.pending_ids, topic)
+
+    async def latest(self, post_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.journal.latest, post_id)
+
+    async def stats(self) -> dict:
+        return {**await asyncio.to_thread(self.journal.stats), "workers": len(self.tasks)}
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        self.tasks = []
+        await asyncio.to_thread(self.journal.release, self.owner)
+
+    async def work(self):
+        while True:
+            self.wake.clear()
+            entries = await asyncio.to_thread(self.journal.claim, self.owner, self.batch_size)
+            if not entries:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.wake.wait(), self.poll_interval)
+                continue
+            await self.process(entries)
+
+    async def process(self, entries: List[sqlite3.Row]):
+        seqs = [entry["seq"] for entry in entries]
+        # Later writes to a post replace earlier ones in the same batch
+        latest = {entry["post_id"]: json.loads(entry["payload"]) for entry in entries}
+        try:
+            await self.apply(list(latest.items()))
+        except Exception as exc:
+            print(f"Write-behind batch of {len(latest)} posts failed ({exc!r}); will retry")
+            await asyncio.to_thread(
+                self.journal.retry, seqs, repr(exc), self.retry_delay, self.max_attempts
+            )
+            return
+        await asyncio.to_thread(self.journal.complete, seqs)
+        await asyncio.to_thread(self.journal.prune, self.retention)
+
+    async def drain(self, poll: float = 0.01):
+        """Wait until no write is pending; for tests, benchmarks and scripts"""
+        while (await asyncio.to_thread(self.journal.stats))["pending"]:
+            await asyncio.sleep(poll)
@@ -1,5 +1,5 @@
 import { describe, it, expect, vi, beforeEach } from 'vitest'
-import { render, screen } from '@testing-library/react'
+import { render, screen, fireEvent } from '@testing-library/react'
 import App from './App'
 
 // Mock fetch
@@ -8,6 +8,7 @@ global.fetch = vi.fn()
 beforeEach(() => {
   vi.resetAllMocks()
   ;(global.fetch as ReturnType<typeof vi.fn>).mockResolvedValue({
+    headers: new Headers(),
     json: async () => []
   })
 })
@@ -32,6 +33,16 @@ describe('App', () => {
 
   it('fetches posts on mount', async () => {
     render(<App />)
-    expect(global.fetch).toHaveBeenCalledWith('/api/posts')
+    expect(global.fetch).toHaveBeenCalledWith('/api/posts?limit=24')
+  })
+
+  it('loads the next page with the returned cursor', async () => {
+    ;(global.fetch as ReturnType<typeof vi.fn>).mockResolvedValueOnce({
+      headers: new Headers({ 'X-Next-Cursor': 'abc' }),
+      json: async () => [{ id: '1', title: 'First Post', content: 'Content', topic: 'test' }]
+    })
+    render(<App />)
+    fireEvent.click(await screen.findByText('Load more'))
+    expect(global.fetch).toHaveBeenCalledWith('/api/posts?limit=24&cursor=abc')
   })
 })
@@ -30,6 +30,35 @@ import {
   AutoAwesome as GenerateIcon
 } from '@mui/icons-material'
 
+const PAGE_SIZE = 24
+
+// Reads a text/event-stream response body, calling onEvent for each complete event
+async function readServerSentEvents(
+  response: Response,
+  onEvent: (event: string, data: any) => void
+) {
+  const reader = response.body!.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary: number
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      onEvent(event, data ? JSON.parse(data) : null)
+    }
+  }
+}
+
 interface BlogPost {
   id: string
   title: string
@@ -40,7 +69,9 @@ interface BlogPost {
 
 function App() {
   const [posts, setPosts] = useState<BlogPost[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [success, setSuccess] = useState<string | null>(null)
   const [tabValue, setTabValue] = useState(0)
@@ -60,21 +91,35 @@ function App() {
   const [generateTopic, setGenerateTopic] = useState('')
   const [generatedPost, setGeneratedPost] = useState<{ title: string; content: string } | null>(null)
   const [generating, setGenerating] = useState(false)
+  const [queuePosition, setQueuePosition] = useState<number | null>(null)
 
   useEffect(() => {
     fetchPosts()
   }, [])
 
-  const fetchPosts = async () => {
-    setLoading(true)
+  // Loads the first page, or appends the page after `cursor`
+  const fetchPosts = async (cursor?: string) => {
+    if (cursor) {
+      setLoadingMore(true)
+    } else {
+      setLoading(true)
+    }
     try {
-      const response = await fetch('/api/posts')
-      const data = await response.json()
-      setPosts(data)
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+      if (cursor) params.set('cursor', cursor)
+      const response = await fetch(`/api/posts?${params}`)
+      const data: BlogPost[] = await response.json()
+      if (cursor) {
+        setPosts((previous) => [...previous, ...data])
+      } else {
+        setPosts(data)
+      }
+      setNextCursor(response.headers.get('X-Next-Cursor'))
     } catch (err) {
       setError('Failed to fetch posts')
     } finally {
       setLoading(false)
+      setLoadingMore(false)
     }
   }
 
@@ -96,7 +141,7 @@ function App() {
 
   const handleDeletePost = async (postId: string) => {
     try {
-      await fetch(`/api/posts/delete/${postId}`)
+      await fetch(`/api/posts/${postId}`, { method: 'DELETE' })
       setSuccess('Post deleted successfully')
       fetchPosts()
     } catch (err) {
@@ -158,18 +203,36 @@ function App() {
     if (!generateTopic.trim()) return
     setGenerating(true)
     setGeneratedPost(null)
+    setQueuePosition(null)
     try {
-      const response = await fetch('/api/generate', {
+      const response = await fetch('/api/generate/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ topic: generateTopic })
       })
-      const data = await response.json()
-      setGeneratedPost({ title: data.title, content: data.content })
+      if (response.status === 429) {
+        setError('Too many generations in progress, please try again shortly')
+        return
+      }
+      await readServerSentEvents(response, (event, data) => {
+        if (event === 'queued') {
+          setQueuePosition(data.position)
+        } else if (event === 'title') {
+          setQueuePosition(null)
+          setGeneratedPost({ title: data.text, content: '' })
+        } else if (event === 'content') {
+          setGeneratedPost((post) => ({ title: post?.title ?? '', content: (post?.content ?? '') + data.text }))
+        } else if (event === 'done') {
+          setGeneratedPost({ title: data.title, content: data.content })
+        } else if (event === 'error') {
+          setError(data.error)
+        }
+      })
     } catch (err) {
       setError('Failed to generate post')
     } finally {
       setGenerating(false)
+      setQueuePosition(null)
     }
   }
 
@@ -258,6 +321,17 @@ function App() {
                 ))}
               </Grid>
             )}
+            {!loading && nextCursor && (
+              <Box display="flex" justifyContent="center" p={3}>
+                <Button
+                  variant="outlined"
+                  onClick={() => fetchPosts(nextCursor)}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? <CircularProgress size={24} /> : 'Load more'}
+                </Button>
+              </Box>
+            )}
           </Box>
         )}
 
@@ -336,13 +410,18 @@ function App() {
                 Generate
               </Button>
             </Box>
+            {queuePosition !== null && (
+              <Alert severity="info" sx={{ mb: 3 }}>
+                Waiting for the generator, position {queuePosition} in queue
+              </Alert>
+            )}
             {generatedPost && (
               <Card sx={{ mb: 3 }}>
                 <CardContent>
                   <Typography variant="h5" gutterBottom>
                     {generatedPost.title}
                   </Typography>
-                  <Typography variant="body1" paragraph>
+                  <Typography variant="body1" paragraph sx={{ whiteSpace: 'pre-wrap' }}>
                     {generatedPost.content}
                   </Typography>
                 </CardContent>
@@ -351,7 +430,7 @@ function App() {
                     variant="contained"
                     color="primary"
                     onClick={handleSaveGeneratedPost}
-                    disabled={loading}
+                    disabled={loading || generating}
                   >
                     Save Post
                   </Button>